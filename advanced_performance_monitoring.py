@@ -9,18 +9,107 @@ Requirements: 12.1
 
 import time
 import psutil
+import numpy as np
 import threading
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, field
 from collections import deque
 import json
-import statistics
+import operator
+
+try:
+    from numba import jit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    from gilknocker import KnockKnock
+    GILKNOCKER_AVAILABLE = True
+except ImportError:
+    GILKNOCKER_AVAILABLE = False
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# أقصر نافذة زمنية (بالثواني) تُحسب عليها نسبة استخدام المعالج
+MIN_CPU_SAMPLE_WINDOW = 0.05
+
+# فترة تحديث إجمالي ذاكرة النظام المخزن مؤقتاً (بالثواني)
+MEM_TOTAL_REFRESH_INTERVAL = 300.0
+
+# أخذ العينات التكيفي: بعد IDLE_TICKS_BEFORE_BACKOFF عينة خاملة متتالية
+# (معالج أقل من IDLE_CPU_PERCENT ولا طلبات جديدة) تتباعد العينات تدريجياً
+# حتى MAX_IDLE_BACKOFF ضعف الفترة، وتعود فوراً عند أول طلب
+IDLE_CPU_PERCENT = 1.0
+IDLE_TICKS_BEFORE_BACKOFF = 5
+MAX_IDLE_BACKOFF = 10
+
+# فترة استطلاع GIL لمقياس التنافس (بالميكروثانية)
+GIL_POLLING_INTERVAL_MICROS = 1000
+
+# حدود التنبيهات الافتراضية
+DEFAULT_ALERT_THRESHOLDS: Dict[str, float] = {
+    'cpu_percent': 80.0,
+    'memory_percent': 85.0,
+    'error_rate': 0.05,
+    'response_time': 5.0,
+    'gil_contention': 0.3
+}
+
+# ═══════════════════════════════════════════════════════════════════════════
+# تجميع الإحصائيات التاريخية
+# ═══════════════════════════════════════════════════════════════════════════
+
+if NUMBA_AVAILABLE:
+    @jit(nopython=True, cache=True)
+    def _aggregate_window(cpu: np.ndarray, mem: np.ndarray):
+        """
+        حساب (ذروة المعالج، متوسط المعالج، ذروة الذاكرة، متوسط الذاكرة، p95 للمعالج)
+        في مرور واحد على المصفوفات، مع partition جزئي لحساب p95
+        """
+        n = cpu.shape[0]
+        cpu_sum = 0.0
+        mem_sum = 0.0
+        peak_cpu = cpu[0]
+        peak_mem = mem[0]
+        for i in range(n):
+            c = cpu[i]
+            m = mem[i]
+            cpu_sum += c
+            mem_sum += m
+            if c > peak_cpu:
+                peak_cpu = c
+            if m > peak_mem:
+                peak_mem = m
+        k = int(0.95 * (n - 1))
+        p95_cpu = np.partition(cpu, k)[k]
+        return peak_cpu, cpu_sum / n, peak_mem, mem_sum / n, p95_cpu
+else:
+    def _aggregate_window(cpu: np.ndarray, mem: np.ndarray):
+        """البديل المتجه بـ NumPy عند عدم توفر Numba"""
+        n = cpu.shape[0]
+        k = int(0.95 * (n - 1))
+        return (
+            cpu.max(), cpu.mean(dtype=np.float64),
+            mem.max(), mem.mean(dtype=np.float64),
+            np.partition(cpu, k)[k]
+        )
+
+def _percentile_95(values: np.ndarray) -> float:
+    """p95 وحده بـ partition جزئي في المكان؛ يُمرَّر إليها نسخة يجوز إعادة ترتيبها"""
+    k = int(0.95 * (values.shape[0] - 1))
+    values.partition(k)
+    return float(values[k])
+
 # ═══════════════════════════════════════════════════════════════════════════
 # نماذج البيانات
 # ═══════════════════════════════════════════════════════════════════════════
@@ -28,7 +117,7 @@ logger = logging.getLogger(__name__)
 @dataclass
 class PerformanceSnapshot:
     """لقطة أداء في لحظة معينة"""
-    timestamp: datetime
+    timestamp: int  # نانوثانية منذ epoch (time.time_ns)
     cpu_percent: float
     memory_mb: float
     memory_percent: float
@@ -36,6 +125,7 @@ class PerformanceSnapshot:
     request_count: int
     error_count: int
     average_response_time: float
+    gil_contention: float = 0.0  # نسبة زمن انتظار GIL (0..1)، تتطلب gilknocker
 
 @dataclass
 class PerformanceAlert:
@@ -46,7 +136,7 @@ class PerformanceAlert:
     current_value: float
     threshold_value: float
     message: str
-    timestamp: datetime
+    timestamp: int  # نانوثانية منذ epoch (time.time_ns)
     acknowledged: bool = False
 
 @dataclass
@@ -59,14 +149,67 @@ class PerformanceMetrics:
     peak_memory_mb: float = 0.0
     average_cpu_percent: float = 0.0
     average_memory_mb: float = 0.0
+    p95_cpu_percent: float = 0.0
     total_requests: int = 0
     successful_requests: int = 0
     failed_requests: int = 0
     average_response_time: float = 0.0
+    gil_contention: float = 0.0
     requests_per_second: float = 0.0
     uptime_seconds: float = 0.0
     active_alerts: List[PerformanceAlert] = field(default_factory=list)
 
+def _snapshot_error_rate(snapshot: PerformanceSnapshot) -> float:
+    """معدل الأخطاء وقت أخذ اللقطة"""
+    return (
+        snapshot.error_count / snapshot.request_count
+        if snapshot.request_count > 0 else 0
+    )
+
+# قواعد التنبيه: (دالة القراءة، الخطورة، معرف التنبيه، اسم المقياس، قالب الرسالة)
+ALERT_RULES = (
+    (operator.attrgetter('cpu_percent'), 'high', 'high_cpu', 'cpu_percent',
+     "استخدام المعالج مرتفع: {:.1f}%"),
+    (operator.attrgetter('memory_percent'), 'high', 'high_memory', 'memory_percent',
+     "استخدام الذاكرة مرتفع: {:.1f}%"),
+    (_snapshot_error_rate, 'critical', 'high_error_rate', 'error_rate',
+     "معدل الأخطاء مرتفع: {:.2%}"),
+    (operator.attrgetter('average_response_time'), 'medium', 'slow_response', 'response_time',
+     "زمن الاستجابة بطيء: {:.2f}s"),
+    (operator.attrgetter('gil_contention'), 'medium', 'high_gil_contention', 'gil_contention',
+     "تنافس GIL مرتفع: {:.1%}"),
+)
+
+class AlertThresholds(dict):
+    """
+    قاموس حدود التنبيهات يستدعي on_change بعد كل تعديل، ليبقى جدول الفحص
+    المُجمَّع مطابقاً للحدود دون استدعاء يدوي لإعادة البناء
+    """
+    
+    def __init__(self, values: Dict[str, float], on_change):
+        super().__init__(values)
+        self._on_change = on_change
+    
+    def _mutating(name):
+        method = getattr(dict, name)
+        
+        def wrapper(self, *args, **kwargs):
+            result = method(self, *args, **kwargs)
+            self._on_change()
+            return result
+        wrapper.__name__ = name
+        return wrapper
+    
+    __setitem__ = _mutating('__setitem__')
+    __delitem__ = _mutating('__delitem__')
+    __ior__ = _mutating('__ior__')
+    update = _mutating('update')
+    setdefault = _mutating('setdefault')
+    pop = _mutating('pop')
+    popitem = _mutating('popitem')
+    clear = _mutating('clear')
+    del _mutating
+
 # ═══════════════════════════════════════════════════════════════════════════
 # نظام المراقبة المتقدم
 # ═══════════════════════════════════════════════════════════════════════════
@@ -87,21 +230,39 @@ class AdvancedPerformanceMonitor:
         self.sampling_interval = sampling_interval
         self.history_size = history_size
         
-        # حدود التنبيهات الافتراضية
-        self.alert_thresholds = alert_thresholds or {
-            'cpu_percent': 80.0,
-            'memory_percent': 85.0,
-            'error_rate': 0.05,
-            'response_time': 5.0
-        }
+        # حدود التنبيهات: القيم المُمررة تتجاوز الافتراضية، والمفقودة تأخذ الافتراضي
+        self.alert_thresholds = alert_thresholds or {}
         
         # البيانات
-        self.snapshots: deque = deque(maxlen=history_size)
+        # اللقطات محفوظة كمصفوفات NumPy دائرية (Struct-of-Arrays) بدلاً من
+        # كائنات dataclass، وتُعاد بناء PerformanceSnapshot عند القراءة فقط
+        self._ts_buf = np.zeros(history_size, dtype=np.int64)
+        self._cpu_buf = np.zeros(history_size, dtype=np.float32)
+        self._mem_mb_buf = np.zeros(history_size, dtype=np.float32)
+        self._mem_pct_buf = np.zeros(history_size, dtype=np.float32)
+        self._threads_buf = np.zeros(history_size, dtype=np.int32)
+        self._req_count_buf = np.zeros(history_size, dtype=np.int64)
+        self._err_count_buf = np.zeros(history_size, dtype=np.int64)
+        self._resp_time_buf = np.zeros(history_size, dtype=np.float32)
+        self._gil_buf = np.zeros(history_size, dtype=np.float32)
+        self._buf_head = 0   # موضع الكتابة التالي
+        self._buf_count = 0  # عدد اللقطات المحفوظة
         self.alerts: List[PerformanceAlert] = []
+        # فهرس التنبيهات غير المؤكدة حسب المعرف لفحص التكرار في O(1)؛
+        # يحفظ ترتيب الإنشاء ويُستخدم كقائمة التنبيهات النشطة
+        self._active_alert_index: Dict[str, PerformanceAlert] = {}
         self.request_times: deque = deque(maxlen=1000)
+        self._req_time_sum = 0.0
+        
+        # مجاميع وقيم ذروة تراكمية للقطات (تُحدَّث عند كل إضافة/إزاحة)
+        self._cpu_sum = 0.0
+        self._mem_sum = 0.0
+        self._peak_cpu = 0.0
+        self._peak_mem = 0.0
         
         # الإحصائيات
         self.start_time = datetime.now()
+        self._start_monotonic = time.monotonic()
         self.total_requests = 0
         self.successful_requests = 0
         self.failed_requests = 0
@@ -109,10 +270,33 @@ class AdvancedPerformanceMonitor:
         # المراقبة
         self.monitoring = False
         self.monitor_thread: Optional[threading.Thread] = None
-        self.lock = threading.Lock()
+        
+        # أخذ العينات التكيفي
+        self._idle_ticks = 0
+        self._last_request_count = 0
+        self._wake_event = threading.Event()
+        # أقفال منفصلة لكل مجموعة بيانات لتقليل التنافس بين record_request
+        # وحلقة المراقبة. عند الحاجة لأكثر من قفل يُلتزم بالترتيب:
+        # counters ← snapshots ← alerts
+        self._counters_lock = threading.Lock()
+        self._snapshots_lock = threading.Lock()
+        self._alerts_lock = threading.Lock()
         
         # العملية الحالية
         self.process = psutil.Process()
+        
+        # معلومات النظام الثابتة تقريباً: تُقرأ مرة واحدة بدلاً من كل عينة
+        self._num_cores = psutil.cpu_count(logical=True) or 1
+        self._mem_total_bytes = psutil.virtual_memory().total
+        self._mem_total_read_at = time.monotonic()
+        
+        # آخر قراءة تراكمية لزمن المعالج لحساب النسبة دون انتظار
+        self._last_cpu_times = self.process.cpu_times()
+        self._last_cpu_ts = time.monotonic()
+        self._last_cpu_percent = 0.0
+        
+        # مقياس تنافس GIL (اختياري)
+        self._gil_knocker = None
     
     def start(self):
         """بدء المراقبة"""
@@ -123,6 +307,25 @@ class AdvancedPerformanceMonitor:
         self.monitoring = True
         self.start_time = datetime.now()
         
+        # تجميع نواة Numba هنا (أو تحميلها من الذاكرة المؤقتة) بدلاً من أول
+        # استدعاء لـ get_historical_summary، وبنفس أنواع المصفوفات الدائرية
+        _aggregate_window(self._cpu_buf[:1].copy(), self._mem_mb_buf[:1].copy())
+        self._start_monotonic = time.monotonic()
+        
+        # إيقاظ متبقٍ من تشغيل سابق لا يقطع أول انتظار في الحلقة الجديدة
+        self._wake_event.clear()
+        self._idle_ticks = 0
+        
+        if GILKNOCKER_AVAILABLE:
+            self._gil_knocker = KnockKnock(polling_interval_micros=GIL_POLLING_INTERVAL_MICROS)
+            self._gil_knocker.start()
+        
+        # مرجع زمن المعالج يبدأ من هنا: أول نسبة لا تشمل الفترة منذ الإنشاء
+        # ولا كلفة تجميع النواة أعلاه
+        self._last_cpu_times = self.process.cpu_times()
+        self._last_cpu_ts = time.monotonic()
+        self._last_cpu_percent = 0.0
+        
         self.monitor_thread = threading.Thread(target=self._monitoring_loop, daemon=True)
         self.monitor_thread.start()
         
@@ -131,118 +334,275 @@ class AdvancedPerformanceMonitor:
     def stop(self):
         """إيقاف المراقبة"""
         self.monitoring = False
+        self._wake_event.set()
         
         if self.monitor_thread:
             self.monitor_thread.join(timeout=5)
+        self._wake_event.clear()
+        
+        if self._gil_knocker is not None:
+            self._gil_knocker.stop()
+            self._gil_knocker = None
         
         logger.info("توقفت مراقبة الأداء")
     
     def _monitoring_loop(self):
         """حلقة المراقبة الرئيسية"""
+        # جدولة بمواعيد نهائية على ساعة رتيبة: زمن جمع العينة لا يُضاف
+        # إلى فترة الانتظار، فيبقى معدل العينات ثابتاً عند الفترة المحددة
+        next_tick = time.monotonic()
+        
         while self.monitoring:
+            snapshot = None
             try:
                 # جمع البيانات
                 snapshot = self._collect_snapshot()
                 
-                with self.lock:
-                    self.snapshots.append(snapshot)
+                with self._snapshots_lock:
+                    self._append_snapshot(snapshot)
                 
                 # فحص التنبيهات
                 self._check_alerts(snapshot)
                 
-                # انتظار الفترة التالية
-                time.sleep(self.sampling_interval)
-                
             except Exception as e:
                 logger.error(f"خطأ في حلقة المراقبة: {e}")
+            
+            # انتظار الموعد التالي (أطول أثناء الخمول)
+            interval = self._next_sampling_interval(snapshot)
+            next_tick += interval
+            sleep_for = next_tick - time.monotonic()
+            if sleep_for > 0:
+                # record_request يوقظ الحلقة مبكراً إذا وصل طلب أثناء الخمول
+                if self._wake_event.wait(sleep_for):
+                    self._wake_event.clear()
+                    self._idle_ticks = 0
+                    next_tick = time.monotonic()
+            else:
+                if -sleep_for > interval:
+                    logger.warning(
+                        f"المراقبة متأخرة عن جدول العينات بـ {-sleep_for:.3f}s"
+                    )
+                # إعادة ضبط الجدول بدلاً من محاولة تعويض العينات الفائتة
+                next_tick = time.monotonic()
+    
+    def _next_sampling_interval(self, snapshot: Optional[PerformanceSnapshot]) -> float:
+        """
+        أخذ العينات التكيفي: الفترة حتى العينة التالية
+        
+        تُضاعف الفترة تدريجياً حين تبقى العملية خاملة، لتقليل كلفة المراقب نفسه
+        """
+        if (snapshot is not None
+                and snapshot.cpu_percent < IDLE_CPU_PERCENT
+                and snapshot.request_count == self._last_request_count):
+            self._idle_ticks += 1
+        else:
+            self._idle_ticks = 0
+        
+        if snapshot is not None:
+            self._last_request_count = snapshot.request_count
+        
+        if self._idle_ticks < IDLE_TICKS_BEFORE_BACKOFF:
+            return self.sampling_interval
+        
+        backoff = min(MAX_IDLE_BACKOFF, 1 + self._idle_ticks - IDLE_TICKS_BEFORE_BACKOFF)
+        return self.sampling_interval * backoff
+    
+    def _append_snapshot(self, snapshot: PerformanceSnapshot):
+        """
+        إضافة لقطة مع تحديث المجاميع والذروة تدريجياً
+        
+        يجب استدعاؤها مع الاحتفاظ بقفل اللقطات
+        """
+        idx = self._buf_head
+        full = self._buf_count == self.history_size
+        evicted_cpu = float(self._cpu_buf[idx])
+        evicted_mem = float(self._mem_mb_buf[idx])
+        
+        self._ts_buf[idx] = snapshot.timestamp
+        self._cpu_buf[idx] = snapshot.cpu_percent
+        self._mem_mb_buf[idx] = snapshot.memory_mb
+        self._mem_pct_buf[idx] = snapshot.memory_percent
+        self._threads_buf[idx] = snapshot.active_threads
+        self._req_count_buf[idx] = snapshot.request_count
+        self._err_count_buf[idx] = snapshot.error_count
+        self._resp_time_buf[idx] = snapshot.average_response_time
+        self._gil_buf[idx] = snapshot.gil_contention
+        
+        self._buf_head = (idx + 1) % self.history_size
+        if not full:
+            self._buf_count += 1
+        
+        # القيم كما خُزنت (float32) حتى يتطابق الطرح عند الإزاحة مع الإضافة
+        cpu = float(self._cpu_buf[idx])
+        mem = float(self._mem_mb_buf[idx])
+        self._cpu_sum += cpu
+        self._mem_sum += mem
+        
+        if not full:
+            self._peak_cpu = max(self._peak_cpu, cpu)
+            self._peak_mem = max(self._peak_mem, mem)
+            return
+        
+        self._cpu_sum -= evicted_cpu
+        self._mem_sum -= evicted_mem
+        
+        # إعادة حساب الذروة فقط إذا كانت القيمة المُزاحة هي الذروة (نادر)
+        if evicted_cpu >= self._peak_cpu:
+            self._peak_cpu = float(self._cpu_buf.max())
+        else:
+            self._peak_cpu = max(self._peak_cpu, cpu)
+        
+        if evicted_mem >= self._peak_mem:
+            self._peak_mem = float(self._mem_mb_buf.max())
+        else:
+            self._peak_mem = max(self._peak_mem, mem)
+    
+    def _snapshot_at(self, idx: int) -> PerformanceSnapshot:
+        """إعادة بناء لقطة من المصفوفات الدائرية"""
+        return PerformanceSnapshot(
+            timestamp=int(self._ts_buf[idx]),
+            cpu_percent=float(self._cpu_buf[idx]),
+            memory_mb=float(self._mem_mb_buf[idx]),
+            memory_percent=float(self._mem_pct_buf[idx]),
+            active_threads=int(self._threads_buf[idx]),
+            request_count=int(self._req_count_buf[idx]),
+            error_count=int(self._err_count_buf[idx]),
+            average_response_time=float(self._resp_time_buf[idx]),
+            gil_contention=float(self._gil_buf[idx])
+        )
+    
+    def _ordered_indices(self) -> np.ndarray:
+        """مواضع اللقطات في المصفوفات الدائرية من الأقدم إلى الأحدث"""
+        start = (self._buf_head - self._buf_count) % self.history_size
+        return (start + np.arange(self._buf_count)) % self.history_size
+    
+    @property
+    def snapshots(self) -> List[PerformanceSnapshot]:
+        """جميع اللقطات المحفوظة مرتبة زمنياً"""
+        with self._snapshots_lock:
+            return [self._snapshot_at(i) for i in self._ordered_indices()]
+    
+    def _get_mem_total_bytes(self) -> int:
+        """إجمالي ذاكرة النظام مع تحديث دوري نادر (لحالات إضافة الذاكرة أثناء التشغيل)"""
+        now = time.monotonic()
+        if now - self._mem_total_read_at >= MEM_TOTAL_REFRESH_INTERVAL:
+            self._mem_total_bytes = psutil.virtual_memory().total
+            self._mem_total_read_at = now
+        return self._mem_total_bytes
+    
+    def _sample_cpu_percent(self) -> float:
+        """
+        حساب نسبة استخدام المعالج من فرق الأزمنة التراكمية بين عينتين
+        
+        بديل غير حاجب لـ cpu_percent(interval=0.1) الذي كان ينام 100ms في كل عينة
+        """
+        cpu_times = self.process.cpu_times()
+        now = time.monotonic()
+        
+        wall_delta = now - self._last_cpu_ts
+        
+        # أزمنة المعالج تتقدم بدقة نبضة النواة (~10ms)، فالنافذة القصيرة جداً
+        # تعطي قيماً مضللة؛ نعيد القيمة السابقة ونترك النافذة تتسع
+        if wall_delta < MIN_CPU_SAMPLE_WINDOW:
+            return self._last_cpu_percent
+        
+        busy_delta = (
+            (cpu_times.user - self._last_cpu_times.user) +
+            (cpu_times.system - self._last_cpu_times.system)
+        )
+        
+        self._last_cpu_times = cpu_times
+        self._last_cpu_ts = now
+        self._last_cpu_percent = min(100.0, busy_delta / wall_delta / self._num_cores * 100)
+        
+        return self._last_cpu_percent
     
     def _collect_snapshot(self) -> PerformanceSnapshot:
         """جمع لقطة أداء"""
         # معلومات المعالج والذاكرة
-        cpu_percent = self.process.cpu_percent(interval=0.1)
-        memory_info = self.process.memory_info()
+        # oneshot يجمع قراءات /proc/<pid> في قراءة واحدة لكل لقطة
+        with self.process.oneshot():
+            cpu_percent = self._sample_cpu_percent()
+            memory_info = self.process.memory_info()
+        
         memory_mb = memory_info.rss / (1024 * 1024)
-        memory_percent = self.process.memory_percent()
+        # نسبة الذاكرة من الإجمالي المخزن بدلاً من memory_percent()
+        # التي تقرأ /proc/meminfo في كل استدعاء
+        memory_percent = memory_info.rss / self._get_mem_total_bytes() * 100
         
         # عدد الخيوط النشطة
         active_threads = threading.active_count()
         
+        # تنافس GIL منذ العينة السابقة (يُصفَّر بعد كل قراءة)
+        gil_contention = 0.0
+        knocker = self._gil_knocker
+        if knocker is not None:
+            gil_contention = knocker.contention_metric
+            knocker.reset_contention_metric()
+        
         # حساب متوسط زمن الاستجابة
-        with self.lock:
+        with self._counters_lock:
             avg_response_time = (
-                statistics.mean(self.request_times) 
+                self._req_time_sum / len(self.request_times)
                 if self.request_times else 0.0
             )
+            request_count = self.total_requests
+            error_count = self.failed_requests
         
         return PerformanceSnapshot(
-            timestamp=datetime.now(),
+            timestamp=time.time_ns(),
             cpu_percent=cpu_percent,
             memory_mb=memory_mb,
             memory_percent=memory_percent,
             active_threads=active_threads,
-            request_count=self.total_requests,
-            error_count=self.failed_requests,
-            average_response_time=avg_response_time
+            request_count=request_count,
+            error_count=error_count,
+            average_response_time=avg_response_time,
+            gil_contention=gil_contention
         )
     
-    def _check_alerts(self, snapshot: PerformanceSnapshot):
-        """فحص التنبيهات"""
-        # فحص المعالج
-        if snapshot.cpu_percent > self.alert_thresholds['cpu_percent']:
-            self._create_alert(
-                'high_cpu',
-                'high',
-                'cpu_percent',
-                snapshot.cpu_percent,
-                self.alert_thresholds['cpu_percent'],
-                f"استخدام المعالج مرتفع: {snapshot.cpu_percent:.1f}%"
-            )
-        
-        # فحص الذاكرة
-        if snapshot.memory_percent > self.alert_thresholds['memory_percent']:
-            self._create_alert(
-                'high_memory',
-                'high',
-                'memory_percent',
-                snapshot.memory_percent,
-                self.alert_thresholds['memory_percent'],
-                f"استخدام الذاكرة مرتفع: {snapshot.memory_percent:.1f}%"
-            )
-        
-        # فحص معدل الأخطاء
-        error_rate = (
-            self.failed_requests / self.total_requests 
-            if self.total_requests > 0 else 0
+    @property
+    def alert_thresholds(self) -> AlertThresholds:
+        """حدود التنبيهات؛ تعديلها أو استبدالها يعيد بناء جدول الفحص تلقائياً"""
+        return self._alert_thresholds
+    
+    @alert_thresholds.setter
+    def alert_thresholds(self, thresholds: Dict[str, float]):
+        self._alert_thresholds = AlertThresholds(
+            {**DEFAULT_ALERT_THRESHOLDS, **thresholds}, self._rebuild_alert_table
         )
+        self._rebuild_alert_table()
+    
+    def _rebuild_alert_table(self):
+        """
+        بناء جدول فحص التنبيهات من الحدود الحالية
         
-        if error_rate > self.alert_thresholds['error_rate']:
-            self._create_alert(
-                'high_error_rate',
-                'critical',
-                'error_rate',
-                error_rate,
-                self.alert_thresholds['error_rate'],
-                f"معدل الأخطاء مرتفع: {error_rate:.2%}"
-            )
-        
-        # فحص زمن الاستجابة
-        if snapshot.average_response_time > self.alert_thresholds['response_time']:
-            self._create_alert(
-                'slow_response',
-                'medium',
-                'response_time',
-                snapshot.average_response_time,
-                self.alert_thresholds['response_time'],
-                f"زمن الاستجابة بطيء: {snapshot.average_response_time:.2f}s"
-            )
+        كل مدخل: (دالة القراءة، الحد، الخطورة، معرف التنبيه، اسم المقياس، قالب الرسالة)؛
+        الحد المحذوف من القاموس يعود إلى قيمته الافتراضية
+        """
+        thresholds = self._alert_thresholds
+        self._alert_table = tuple(
+            (getter, thresholds.get(metric_name, DEFAULT_ALERT_THRESHOLDS[metric_name]),
+             severity, alert_id, metric_name, fmt)
+            for getter, severity, alert_id, metric_name, fmt in ALERT_RULES
+        )
+    
+    def _check_alerts(self, snapshot: PerformanceSnapshot):
+        """فحص التنبيهات"""
+        for getter, threshold, severity, alert_id, metric_name, fmt in self._alert_table:
+            value = getter(snapshot)
+            if value > threshold:
+                self._create_alert(
+                    alert_id, severity, metric_name,
+                    value, threshold, fmt.format(value)
+                )
     
     def _create_alert(self, alert_id: str, severity: str, metric_name: str,
                      current_value: float, threshold_value: float, message: str):
         """إنشاء تنبيه جديد"""
         # تجنب التنبيهات المكررة
-        with self.lock:
-            existing = [a for a in self.alerts if a.alert_id == alert_id and not a.acknowledged]
-            if existing:
+        with self._alerts_lock:
+            if alert_id in self._active_alert_index:
                 return
             
             alert = PerformanceAlert(
@@ -252,15 +612,16 @@ class AdvancedPerformanceMonitor:
                 current_value=current_value,
                 threshold_value=threshold_value,
                 message=message,
-                timestamp=datetime.now()
+                timestamp=time.time_ns()
             )
             
             self.alerts.append(alert)
+            self._active_alert_index[alert_id] = alert
             logger.warning(f"تنبيه جديد: {message}")
     
     def record_request(self, response_time: float, success: bool = True):
         """تسجيل طلب"""
-        with self.lock:
+        with self._counters_lock:
             self.total_requests += 1
             
             if success:
@@ -268,73 +629,127 @@ class AdvancedPerformanceMonitor:
             else:
                 self.failed_requests += 1
             
+            if len(self.request_times) == self.request_times.maxlen:
+                self._req_time_sum -= self.request_times[0]
+            
             self.request_times.append(response_time)
+            self._req_time_sum += response_time
+        
+        # إنهاء فترة الخمول فوراً بدلاً من انتظار العينة المتباعدة؛ الإيقاظ فقط
+        # حين تكون الفترة الحالية أطول من الأساسية، لا مع كل طلب
+        if self._idle_ticks > IDLE_TICKS_BEFORE_BACKOFF:
+            self._wake_event.set()
     
     def get_current_metrics(self) -> PerformanceMetrics:
         """الحصول على المقاييس الحالية"""
-        with self.lock:
-            if not self.snapshots:
-                return PerformanceMetrics()
-            
-            # أحدث لقطة
-            latest = self.snapshots[-1]
-            
-            # حساب الإحصائيات
-            cpu_values = [s.cpu_percent for s in self.snapshots]
-            memory_values = [s.memory_mb for s in self.snapshots]
-            
-            # حساب الطلبات في الثانية
-            uptime = (datetime.now() - self.start_time).total_seconds()
-            rps = self.total_requests / uptime if uptime > 0 else 0
+        # كل قفل يُؤخذ لفترة قصيرة وبالترتيب الثابت: counters ← snapshots ← alerts
+        with self._counters_lock:
+            total_requests = self.total_requests
+            successful_requests = self.successful_requests
+            failed_requests = self.failed_requests
             
             # متوسط زمن الاستجابة
             avg_response_time = (
-                statistics.mean(self.request_times) 
+                self._req_time_sum / len(self.request_times)
                 if self.request_times else 0.0
             )
+        
+        with self._snapshots_lock:
+            count = self._buf_count
+            if not count:
+                return PerformanceMetrics()
             
-            # التنبيهات النشطة
-            active_alerts = [a for a in self.alerts if not a.acknowledged]
-            
-            return PerformanceMetrics(
-                current_cpu_percent=latest.cpu_percent,
-                current_memory_mb=latest.memory_mb,
-                current_memory_percent=latest.memory_percent,
-                peak_cpu_percent=max(cpu_values),
-                peak_memory_mb=max(memory_values),
-                average_cpu_percent=statistics.mean(cpu_values),
-                average_memory_mb=statistics.mean(memory_values),
-                total_requests=self.total_requests,
-                successful_requests=self.successful_requests,
-                failed_requests=self.failed_requests,
-                average_response_time=avg_response_time,
-                requests_per_second=rps,
-                uptime_seconds=uptime,
-                active_alerts=active_alerts
-            )
+            # أحدث لقطة
+            latest = self._snapshot_at((self._buf_head - 1) % self.history_size)
+            peak_cpu = self._peak_cpu
+            peak_mem = self._peak_mem
+            average_cpu = self._cpu_sum / count
+            average_mem = self._mem_sum / count
+            # نسخة سريعة تحت القفل، والمئين O(N) يُحسب خارجه فلا تنتظر حلقة المراقبة؛
+            # ترتيب العناصر لا يؤثر في المئين، فلا حاجة لإعادة ترتيب الحلقة.
+            # الذروة والمتوسط من المجاميع الجارية، فيكفي هنا p95 للمعالج وحده
+            cpu = self._cpu_buf[:count].copy()
+        
+        p95_cpu = _percentile_95(cpu)
+        
+        with self._alerts_lock:
+            # التنبيهات النشطة: من الفهرس مباشرة في O(عدد النشطة) بدلاً من
+            # المرور على تاريخ التنبيهات كاملاً
+            active_alerts = list(self._active_alert_index.values())
+        
+        # حساب الطلبات في الثانية
+        uptime = time.monotonic() - self._start_monotonic
+        rps = total_requests / uptime if uptime > 0 else 0
+        
+        return PerformanceMetrics(
+            current_cpu_percent=latest.cpu_percent,
+            current_memory_mb=latest.memory_mb,
+            current_memory_percent=latest.memory_percent,
+            peak_cpu_percent=peak_cpu,
+            peak_memory_mb=peak_mem,
+            average_cpu_percent=average_cpu,
+            average_memory_mb=average_mem,
+            p95_cpu_percent=p95_cpu,
+            total_requests=total_requests,
+            successful_requests=successful_requests,
+            failed_requests=failed_requests,
+            average_response_time=avg_response_time,
+            gil_contention=latest.gil_contention,
+            requests_per_second=rps,
+            uptime_seconds=uptime,
+            active_alerts=active_alerts
+        )
+    
+    def _window_indices(self, minutes: int) -> np.ndarray:
+        """
+        مواضع لقطات آخر `minutes` دقيقة مرتبة زمنياً
+        
+        يجب استدعاؤها مع الاحتفاظ بقفل اللقطات
+        """
+        cutoff_ns = time.time_ns() - int(minutes * 60 * 1e9)
+        
+        # الطوابع الزمنية مرتبة تصاعدياً بترتيب الإدخال، فالبحث الثنائي يكفي
+        indices = self._ordered_indices()
+        first = int(np.searchsorted(self._ts_buf[indices], cutoff_ns, side='left'))
+        return indices[first:]
     
     def get_historical_data(self, minutes: int = 60) -> List[PerformanceSnapshot]:
         """الحصول على البيانات التاريخية"""
-        cutoff_time = datetime.now() - timedelta(minutes=minutes)
-        
-        with self.lock:
-            return [
-                s for s in self.snapshots 
-                if s.timestamp >= cutoff_time
-            ]
+        with self._snapshots_lock:
+            return [self._snapshot_at(i) for i in self._window_indices(minutes)]
+    
+    def get_historical_summary(self, minutes: int = 60) -> Dict[str, float]:
+        """ملخص إحصائي (ذروة، متوسط، p95) لنافذة زمنية من التاريخ"""
+        with self._snapshots_lock:
+            indices = self._window_indices(minutes)
+            if len(indices) == 0:
+                return {}
+            # الفهرسة المتقدمة تنتج نسخاً متصلة في الذاكرة جاهزة للتجميع
+            cpu = self._cpu_buf[indices]
+            mem = self._mem_mb_buf[indices]
+        
+        peak_cpu, avg_cpu, peak_mem, avg_mem, p95_cpu = _aggregate_window(cpu, mem)
+        
+        return {
+            'samples': len(indices),
+            'peak_cpu_percent': float(peak_cpu),
+            'average_cpu_percent': float(avg_cpu),
+            'p95_cpu_percent': float(p95_cpu),
+            'peak_memory_mb': float(peak_mem),
+            'average_memory_mb': float(avg_mem)
+        }
     
     def acknowledge_alert(self, alert_id: str):
         """تأكيد تنبيه"""
-        with self.lock:
-            for alert in self.alerts:
-                if alert.alert_id == alert_id and not alert.acknowledged:
-                    alert.acknowledged = True
-                    logger.info(f"تم تأكيد التنبيه: {alert_id}")
-                    break
+        with self._alerts_lock:
+            alert = self._active_alert_index.pop(alert_id, None)
+            if alert is not None:
+                alert.acknowledged = True
+                logger.info(f"تم تأكيد التنبيه: {alert_id}")
     
     def clear_acknowledged_alerts(self):
         """مسح التنبيهات المؤكدة"""
-        with self.lock:
+        with self._alerts_lock:
             before_count = len(self.alerts)
             self.alerts = [a for a in self.alerts if not a.acknowledged]
             cleared = before_count - len(self.alerts)
@@ -362,6 +777,10 @@ class AdvancedPerformanceMonitor:
                 'cpu_percent': metrics.average_cpu_percent,
                 'memory_mb': metrics.average_memory_mb
             },
+            'p95_metrics': {
+                'cpu_percent': metrics.p95_cpu_percent
+            },
+            'gil_contention': metrics.gil_contention,
             'request_metrics': {
                 'total_requests': metrics.total_requests,
                 'successful_requests': metrics.successful_requests,
@@ -381,14 +800,19 @@ class AdvancedPerformanceMonitor:
                     'current_value': a.current_value,
                     'threshold_value': a.threshold_value,
                     'message': a.message,
-                    'timestamp': a.timestamp.isoformat()
+                    'timestamp': datetime.fromtimestamp(a.timestamp / 1e9).isoformat()
                 }
                 for a in metrics.active_alerts
             ]
         }
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        if ORJSON_AVAILABLE:
+            # orjson يكتب UTF-8 مباشرة (بدون تهريب العربية) وأسرع بعدة مرات
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
         
         logger.info(f"تم تصدير المقاييس إلى: {filename}")
     
@@ -406,12 +830,16 @@ class AdvancedPerformanceMonitor:
         print(f"   الحالي: {metrics.current_cpu_percent:.1f}%")
         print(f"   الذروة: {metrics.peak_cpu_percent:.1f}%")
         print(f"   المتوسط: {metrics.average_cpu_percent:.1f}%")
+        print(f"   p95: {metrics.p95_cpu_percent:.1f}%")
         
         print(f"\n🧠 الذاكرة:")
         print(f"   الحالية: {metrics.current_memory_mb:.1f} MB ({metrics.current_memory_percent:.1f}%)")
         print(f"   الذروة: {metrics.peak_memory_mb:.1f} MB")
         print(f"   المتوسط: {metrics.average_memory_mb:.1f} MB")
         
+        if self._gil_knocker is not None:
+            print(f"\n🔒 تنافس GIL: {metrics.gil_contention:.1%}")
+        
         print(f"\n📊 الطلبات:")
         print(f"   الإجمالي: {metrics.total_requests}")
         print(f"   الناجحة: {metrics.successful_requests}")
@@ -5,26 +5,54 @@ Advanced Python Brain Service for Three-Read Breakdown System
 
 API Endpoints:
 - POST /api/upload: Upload script for processing.
-- GET /api/status/{job_id}: Check processing status.
+- GET /api/status/{job_id}: Check processing status (deprecated, polling).
+- WS /api/ws/status/{job_id}: Push status updates until the job finishes.
 - GET /api/report/{job_id}: Download report.
 - GET /: Web Interface.
 """
 
 import os
+import sys
+import json
+import codecs
 import uuid
 import shutil
+import hashlib
+import sqlite3
+import tempfile
 import asyncio
 import logging
-from typing import Dict, Optional, List, Any
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Dict, Optional, List, Any, Tuple
 from pathlib import Path
 from datetime import datetime
 
-from fastapi import FastAPI, UploadFile, File, BackgroundTasks, HTTPException, Request, Form
+from fastapi import (
+    FastAPI, UploadFile, File, BackgroundTasks, HTTPException, Request, Form,
+    WebSocket, WebSocketDisconnect
+)
 from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
 # Import Revolutionary Breakdown Logic
 try:
     from revolutionary_breakdown_system_v4 import (
@@ -52,8 +80,27 @@ except ImportError:
 logger = logging.getLogger("BrainService")
 logging.basicConfig(level=logging.INFO)
 
+# Scene analysis is CPU-bound, so it runs in worker processes rather than on
+# the event loop; status and upload handlers stay responsive during parses.
+ANALYSIS_WORKERS = os.cpu_count() or 1
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pool per app run, so a restart in the same process (reload, a second
+    # TestClient) never submits to an executor a previous shutdown closed
+    executor = ProcessPoolExecutor(max_workers=ANALYSIS_WORKERS)
+    app.state.executor = executor
+    try:
+        yield
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
 # Initialize FastAPI
-app = FastAPI(title="Revolutionary Breakdown System API")
+app = FastAPI(
+    title="Revolutionary Breakdown System API",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse if ORJSON_AVAILABLE else JSONResponse
+)
 
 # CORS
 app.add_middleware(
@@ -68,17 +115,134 @@ app.add_middleware(
 UPLOAD_DIR = Path("uploads")
 OUTPUT_DIR = Path("outputs")
 TEMPLATES_DIR = Path("templates")
+CACHE_DIR = OUTPUT_DIR / "cache"
+
+# Uploads are copied to disk in 1 MiB chunks (fewer read/write syscalls)
+UPLOAD_CHUNK_SIZE = 1 << 20
 
 UPLOAD_DIR.mkdir(exist_ok=True)
 OUTPUT_DIR.mkdir(exist_ok=True)
 TEMPLATES_DIR.mkdir(exist_ok=True)
+CACHE_DIR.mkdir(exist_ok=True)
 
 # Templates
 templates = Jinja2Templates(directory="templates")
 
-# Job Storage (In-Memory)
+# Job Storage
+FINISHED_STATUSES = ("completed", "failed")
+MAX_JOBS_IN_MEMORY = 10_000
+
+class LRUJobStore:
+    """
+    Bounded in-memory job store backed by SQLite for finished jobs.
+
+    Active jobs always stay in memory. Once the store exceeds `capacity`,
+    the oldest finished jobs are evicted; their final state was already
+    written to SQLite by `persist`, so status queries still resolve.
+    """
+
+    def __init__(self, db_path: Path, capacity: int = MAX_JOBS_IN_MEMORY):
+        self.capacity = capacity
+        self.db_path = Path(db_path)
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Finished job ids in finishing order; eviction pops from the head
+        self._finished: "OrderedDict[str, None]" = OrderedDict()
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use (callers hold `_db_lock`)."""
+        if self._db is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, status TEXT, total_scenes INTEGER, "
+                "message TEXT, result_path TEXT, error TEXT, timestamp TEXT)"
+            )
+            db.commit()
+            self._db = db
+        return self._db
+
+    def __contains__(self, job_id: str) -> bool:
+        return self.get(job_id) is not None
+
+    def __getitem__(self, job_id: str) -> Dict[str, Any]:
+        return self._jobs[job_id]
+
+    def __setitem__(self, job_id: str, job: Dict[str, Any]):
+        self._jobs[job_id] = job
+        self._jobs.move_to_end(job_id)
+        self._finished.pop(job_id, None)
+        self._evict()
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Look the job up in memory first, then in SQLite."""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+
+        with self._db_lock:
+            row = self._connection().execute(
+                "SELECT status, total_scenes, message, result_path, error, timestamp "
+                "FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        status, total_scenes, message, result_path, error, timestamp = row
+        return {
+            "status": status,
+            "progress": 100 if status == "completed" else 0,
+            "total_scenes": total_scenes,
+            "message": message,
+            "result_path": result_path,
+            "error": error,
+            "timestamp": datetime.fromisoformat(timestamp)
+        }
+
+    async def persist(self, job_id: str):
+        """
+        Write a finished job's final state to SQLite, then make it evictable.
+
+        The write and commit run on a worker thread so disk I/O never blocks
+        the event loop; the in-memory bookkeeping stays on the loop.
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job["status"] not in FINISHED_STATUSES:
+            return
+
+        row = (job_id, job["status"], job["total_scenes"], job["message"],
+               job["result_path"], job["error"], job["timestamp"].isoformat())
+        await asyncio.to_thread(self._write_row, row)
+
+        if job_id in self._jobs:
+            self._finished[job_id] = None
+            self._evict()
+
+    def _write_row(self, row: Tuple[Any, ...]):
+        with self._db_lock:
+            db = self._connection()
+            db.execute("INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+            db.commit()
+
+    def _evict(self):
+        """Drop the oldest finished jobs while over capacity."""
+        while len(self._jobs) > self.capacity and self._finished:
+            job_id, _ = self._finished.popitem(last=False)
+            self._jobs.pop(job_id, None)
+
 # Structure: job_id -> {status, progress, total, message, result_path, error, timestamp}
-jobs: Dict[str, Dict[str, Any]] = {}
+# Finished jobs are kept outside the source tree; override with BRAIN_SERVICE_JOBS_DB
+JOBS_DB_PATH = Path(
+    os.environ.get("BRAIN_SERVICE_JOBS_DB")
+    or Path(tempfile.gettempdir()) / "brain_service" / "jobs.db"
+)
+jobs = LRUJobStore(JOBS_DB_PATH)
 
 # Pydantic Models
 class JobResponse(BaseModel):
@@ -95,68 +259,227 @@ class StatusResponse(BaseModel):
     result_url: Optional[str] = None
     error: Optional[str] = None
 
+# Report Cache
+# Bound on cached reports; the least recently used entries are pruned past it
+CACHE_MAX_ENTRIES = 256
+
+def _report_code_version() -> str:
+    """
+    Fingerprint of the parser/renderer source, salted into every cache key so
+    reports cached by an older build are never served after a code change.
+    """
+    module = sys.modules[RevolutionarySceneParser.__module__]
+    return hashlib.sha256(Path(module.__file__).read_bytes()).hexdigest()[:12]
+
+REPORT_CODE_VERSION = _report_code_version()
+
+def compute_cache_key(content_digest: str, config: SystemConfig) -> str:
+    """
+    Build the report cache key from the upload's SHA-256, the options
+    that change the rendered output and the parser/renderer version.
+    """
+    return (
+        f"{content_digest}"
+        f"-w{int(config.enable_wardrobe_inference)}"
+        f"-l{int(config.enable_legal_alerts)}"
+        f"-v{REPORT_CODE_VERSION}"
+    )
+
+def load_cached_report(cache_key: str, output_path: Path) -> Optional[int]:
+    """
+    Copy a cached report to `output_path`.
+    Returns the cached scene count, or None on a cache miss.
+    """
+    cached_report = CACHE_DIR / f"{cache_key}.html"
+    cached_meta = CACHE_DIR / f"{cache_key}.json"
+    try:
+        with open(cached_meta, "rb") as f:
+            raw = f.read()
+        shutil.copyfile(cached_report, output_path)
+    except FileNotFoundError:
+        # Not cached yet, or pruned concurrently
+        return None
+
+    # Refresh the entry's age so pruning drops the least recently used reports
+    os.utime(cached_meta)
+    return (orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw))["total_scenes"]
+
+def _atomic_write(path: Path, write: Any):
+    """Write through a temp file in the same directory, then rename into place."""
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+def store_cached_report(cache_key: str, output_path: Path, total_scenes: int):
+    """
+    Save a finished report under its cache key.
+
+    Both files are swapped in atomically, report first: the metadata file
+    marks the entry complete, so readers never copy a half-written report.
+    """
+    meta = {"total_scenes": total_scenes}
+    raw = orjson.dumps(meta) if ORJSON_AVAILABLE else json.dumps(meta).encode("utf-8")
+    _atomic_write(CACHE_DIR / f"{cache_key}.html", lambda tmp: shutil.copyfile(output_path, tmp))
+    _atomic_write(CACHE_DIR / f"{cache_key}.json", lambda tmp: tmp.write_bytes(raw))
+    prune_report_cache()
+
+def prune_report_cache(max_entries: int = CACHE_MAX_ENTRIES):
+    """Drop the least recently used cache entries beyond `max_entries`."""
+    entries = []
+    for meta_path in CACHE_DIR.glob("*.json"):
+        try:
+            entries.append((meta_path.stat().st_mtime, meta_path))
+        except FileNotFoundError:
+            continue
+    if len(entries) <= max_entries:
+        return
+
+    entries.sort()
+    for _, meta_path in entries[:len(entries) - max_entries]:
+        # Metadata goes first so the entry stops being a hit before its report disappears
+        meta_path.unlink(missing_ok=True)
+        meta_path.with_suffix(".html").unlink(missing_ok=True)
+
+# Scene Analysis (worker processes)
+@lru_cache(maxsize=8)
+def _get_parser(wardrobe_inference: bool, legal_alerts: bool) -> RevolutionarySceneParser:
+    """Reuse one parser per option set inside each worker process."""
+    config = SystemConfig()
+    config.enable_wardrobe_inference = wardrobe_inference
+    config.enable_legal_alerts = legal_alerts
+    return RevolutionarySceneParser(config)
+
+def _analyze_batch(
+    scenes: List[Tuple[str, str]],
+    wardrobe_inference: bool,
+    legal_alerts: bool
+) -> List[DetailedBreakdown]:
+    """
+    Analyze a batch of (scene_num, scene_text) pairs in a worker process.
+    Batching amortizes the pickling cost of each submit.
+    """
+    parser = _get_parser(wardrobe_inference, legal_alerts)
+
+    async def run() -> List[DetailedBreakdown]:
+        return [
+            await parser.analyze_scene(scene_text, scene_num)
+            for scene_num, scene_text in scenes
+        ]
+
+    return asyncio.run(run())
+
+# Job Updates
+def update_job(job_id: str, **fields: Any):
+    """
+    Apply a state change to a job and wake any WebSocket status listeners.
+    """
+    job = jobs[job_id]
+    job.update(fields)
+    job["version"] += 1
+    # set() wakes every current waiter; clear() re-arms the event for the next change
+    job["event"].set()
+    job["event"].clear()
+
 # Background Task
-async def process_script_task(job_id: str, file_path: Path, config: SystemConfig):
+async def process_script_task(job_id: str, file_path: Path, config: SystemConfig,
+                              cache_key: Optional[str] = None):
     """
     Background task to process the script.
     """
     logger.info(f"Starting job {job_id}")
-    jobs[job_id]["status"] = "processing"
-    jobs[job_id]["message"] = "Reading file..."
+    update_job(job_id, status="processing", message="Reading file...")
     
+    output_path = OUTPUT_DIR / f"report_{job_id}.html"
+
     try:
+        # Identical upload with identical options: reuse the cached report
+        if cache_key:
+            cached_scenes = load_cached_report(cache_key, output_path)
+            if cached_scenes is not None:
+                logger.info(f"Job {job_id} served from report cache")
+                update_job(
+                    job_id,
+                    total_scenes=cached_scenes,
+                    status="completed",
+                    progress=100,
+                    message="Completed successfully.",
+                    result_path=str(output_path)
+                )
+                return
+
         # Read file
         with open(file_path, "r", encoding="utf-8") as f:
             content = f.read()
 
         # Split scenes
-        jobs[job_id]["message"] = "Splitting scenes..."
+        update_job(job_id, message="Splitting scenes...")
         scenes_data = split_scenes(content)
         total_scenes = len(scenes_data)
-        jobs[job_id]["total_scenes"] = total_scenes
+        update_job(job_id, total_scenes=total_scenes)
 
         if total_scenes == 0:
             raise ValueError("No scenes found in the script.")
 
-        # Initialize Parser
-        parser = RevolutionarySceneParser(config)
-
-        # Process scenes
-        processed_scenes = []
-        for i, (scene_num, scene_text) in enumerate(scenes_data):
-            jobs[job_id]["message"] = f"Analyzing scene {scene_num}..."
-            # Update progress more frequently
-            jobs[job_id]["progress"] = int((i / total_scenes) * 90) # up to 90%
-
-            # Analyze
-            breakdown = await parser.analyze_scene(scene_text, scene_num)
-            processed_scenes.append(breakdown)
+        # Process scenes in batches of config.chunk_size on the process pool.
+        # Batches are fanned out together; the semaphore keeps at most one
+        # batch per worker in flight so progress reflects real work.
+        loop = asyncio.get_running_loop()
+        batch_size = max(1, config.chunk_size)
+        batches = [
+            scenes_data[start:start + batch_size]
+            for start in range(0, total_scenes, batch_size)
+        ]
+        semaphore = asyncio.Semaphore(ANALYSIS_WORKERS)
+        analyzed = 0
+        update_job(job_id, message="Analyzing scenes...")
+
+        async def analyze_bounded(batch: List[Tuple[str, str]]) -> List[DetailedBreakdown]:
+            nonlocal analyzed
+            async with semaphore:
+                breakdowns = await loop.run_in_executor(
+                    app.state.executor, _analyze_batch, batch,
+                    config.enable_wardrobe_inference, config.enable_legal_alerts
+                )
+            # Single-threaded event loop: no lock needed for the counter
+            analyzed += len(batch)
+            update_job(
+                job_id,
+                progress=int((analyzed / total_scenes) * 90), # up to 90%
+                message=f"Analyzed {analyzed}/{total_scenes} scenes..."
+            )
+            return breakdowns
+
+        # gather preserves batch order, so scenes stay in script order
+        results = await asyncio.gather(*(analyze_bounded(b) for b in batches))
+        processed_scenes = [bd for breakdowns in results for bd in breakdowns]
 
         # Generate HTML
-        jobs[job_id]["message"] = "Generating report..."
-        jobs[job_id]["progress"] = 95
-
-        html_output = HTMLRenderer.render_full_document(processed_scenes)
-
-        # Save Report
-        output_filename = f"report_{job_id}.html"
-        output_path = OUTPUT_DIR / output_filename
+        update_job(job_id, message="Generating report...", progress=95)
 
+        # Save Report (streamed scene by scene, never held whole in memory)
         with open(output_path, "w", encoding="utf-8") as f:
-            f.write(html_output)
+            HTMLRenderer.stream_full_document(processed_scenes, f)
+
+        if cache_key:
+            store_cached_report(cache_key, output_path, total_scenes)
 
         # Complete
-        jobs[job_id]["status"] = "completed"
-        jobs[job_id]["progress"] = 100
-        jobs[job_id]["message"] = "Completed successfully."
-        jobs[job_id]["result_path"] = str(output_path)
+        update_job(
+            job_id,
+            status="completed",
+            progress=100,
+            message="Completed successfully.",
+            result_path=str(output_path)
+        )
 
     except Exception as e:
         logger.error(f"Job {job_id} failed: {e}")
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["message"] = "Processing failed."
-        jobs[job_id]["error"] = str(e)
+        update_job(job_id, status="failed", message="Processing failed.", error=str(e))
     finally:
+        await jobs.persist(job_id)
         # Cleanup upload
         if file_path.exists():
             os.remove(file_path)
@@ -168,6 +491,24 @@ async def home(request: Request):
     """Serve the frontend."""
     return templates.TemplateResponse(request=request, name="index.html")
 
+def extract_pdf_text(pdf_path: Path, text_path: Path) -> None:
+    """
+    Extract the text layer of a PDF script into a UTF-8 text file.
+
+    Pages are written one at a time so memory stays bounded by a single page.
+    """
+    pdf = pdfium.PdfDocument(str(pdf_path))
+    try:
+        with open(text_path, "w", encoding="utf-8") as out:
+            for page in pdf:
+                textpage = page.get_textpage()
+                out.write(textpage.get_text_range().replace("\r\n", "\n"))
+                out.write("\n")
+                textpage.close()
+                page.close()
+    finally:
+        pdf.close()
+
 @app.post("/api/upload", response_model=JobResponse)
 async def upload_script(
     background_tasks: BackgroundTasks,
@@ -180,18 +521,54 @@ async def upload_script(
     """
     job_id = str(uuid.uuid4())
     file_path = UPLOAD_DIR / f"{job_id}_{file.filename}"
-
-    # Save file
+    is_pdf = (
+        (file.filename or "").lower().endswith(".pdf")
+        or file.content_type == "application/pdf"
+    )
+    if is_pdf and not PDFIUM_AVAILABLE:
+        raise HTTPException(status_code=400, detail="PDF uploads require pypdfium2")
+
+    # Save file in large chunks, hashing it on the way so repeat uploads can
+    # hit the report cache. Awaiting UploadFile.read keeps the event loop free
+    # while the spooled upload is read back. Text chunks are also run through
+    # an incremental UTF-8 decoder so undecodable uploads are rejected here,
+    # without buffering the whole file, instead of failing later in the job.
+    hasher = hashlib.sha256()
+    decoder = None if is_pdf else codecs.getincrementaldecoder("utf-8")()
     try:
         with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                if decoder:
+                    decoder.decode(chunk)
+                hasher.update(chunk)
+                buffer.write(chunk)
+            if decoder:
+                decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        file_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail="Script file must be UTF-8 text")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save file: {e}")
 
+    if is_pdf:
+        # A dedicated suffix keeps the extracted text from colliding with the
+        # upload itself (e.g. a PDF uploaded under a *.txt name)
+        text_path = file_path.with_name(file_path.stem + ".extracted.txt")
+        try:
+            await asyncio.to_thread(extract_pdf_text, file_path, text_path)
+        except Exception as e:
+            text_path.unlink(missing_ok=True)
+            raise HTTPException(status_code=400, detail=f"Could not read PDF: {e}")
+        finally:
+            if file_path != text_path:
+                file_path.unlink(missing_ok=True)
+        file_path = text_path
+
     # Configure System
     config = SystemConfig()
     config.enable_wardrobe_inference = wardrobe_inference
     config.enable_legal_alerts = legal_alerts
+    cache_key = compute_cache_key(hasher.hexdigest(), config)
 
     # Initialize Job
     jobs[job_id] = {
@@ -201,23 +578,19 @@ async def upload_script(
         "message": "Queued",
         "result_path": None,
         "error": None,
-        "timestamp": datetime.now()
+        "timestamp": datetime.now(),
+        # Change notification for WebSocket listeners (not persisted)
+        "version": 0,
+        "event": asyncio.Event()
     }
 
     # Start Background Task
-    background_tasks.add_task(process_script_task, job_id, file_path, config)
+    background_tasks.add_task(process_script_task, job_id, file_path, config, cache_key)
 
     return JobResponse(job_id=job_id, status="pending", message="Job queued")
 
-@app.get("/api/status/{job_id}", response_model=StatusResponse)
-async def get_status(job_id: str):
-    """
-    Get the status of a job.
-    """
-    if job_id not in jobs:
-        raise HTTPException(status_code=404, detail="Job not found")
-
-    job = jobs[job_id]
+def build_status(job_id: str, job: Dict[str, Any]) -> StatusResponse:
+    """Build the public status view of a job."""
     result_url = f"/api/report/{job_id}" if job["status"] == "completed" else None
 
     return StatusResponse(
@@ -230,16 +603,63 @@ async def get_status(job_id: str):
         error=job["error"]
     )
 
+@app.get("/api/status/{job_id}", response_model=StatusResponse, deprecated=True)
+async def get_status(job_id: str):
+    """
+    Get the status of a job.
+
+    Deprecated: kept for polling clients; prefer the push-based
+    `/api/ws/status/{job_id}` WebSocket.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return build_status(job_id, job)
+
+@app.websocket("/api/ws/status/{job_id}")
+async def status_updates(websocket: WebSocket, job_id: str):
+    """
+    Push a status frame on every job state change, then close once the
+    job has finished.
+    """
+    await websocket.accept()
+
+    job = jobs.get(job_id)
+    if job is None:
+        await websocket.close(code=4404, reason="Job not found")
+        return
+
+    # Jobs served from SQLite are already finished and have no version/event,
+    # so the sentinel guarantees they still get their single frame
+    sent_version = object()
+    try:
+        while True:
+            version = job.get("version")
+            if version != sent_version:
+                await websocket.send_text(build_status(job_id, job).model_dump_json())
+                sent_version = version
+            # The job may have changed while the frame was being sent; only stop
+            # once the frame that went out already carried the finished state
+            if job.get("version") != sent_version:
+                continue
+            if job["status"] in FINISHED_STATUSES:
+                break
+            await job["event"].wait()
+    except WebSocketDisconnect:
+        return
+
+    await websocket.close()
+
 @app.get("/api/report/{job_id}")
 async def get_report(job_id: str):
     """
     Download the generated report.
     """
-    if job_id not in jobs:
+    job = jobs.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    job = jobs[job_id]
-
     if job["status"] != "completed":
         raise HTTPException(status_code=400, detail="Report not ready")
 
@@ -1,9 +1,20 @@
 import asyncio
+import os
 import re
+import sys
 import logging
+from html import escape
 import aiofiles
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
-from typing import List, Optional, Set, Dict
+from typing import Iterator, List, Optional, Dict
+
+# Aho-Corasick اختياري لمسح كل الكلمات المفتاحية في مرور واحد
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
 
 # ==========================================
 # 1. إعدادات النظام (Configuration & Rules)
@@ -15,6 +26,8 @@ logger = logging.getLogger("AdvancedBreakdown")
 class Config:
     INPUT_FILE = "script.txt"
     OUTPUT_FILE = "professional_breakdown.html"
+    # ملف الـ CSS المشترك بين التقارير عند معالجة عدة سيناريوهات
+    CSS_FILE = "breakdown.css"
     
     # قائمة حظر للكلمات التي قد تظهر خطأً كشخصيات
     CHAR_BLOCKLIST = {
@@ -39,34 +52,104 @@ class Config:
     # قواعد استنتاج المركبات
     VEHICLES_KEYWORDS = ["سيارة", "عربية", "تاكسي", "ميكروباص", "أتوبيس", "موتوسيكل"]
 
+    # قواعد استنتاج الأزياء: كلمة في الموقع -> نوع المكان -> وصف الملابس
+    LOCATION_KINDS = {
+        "منزل": "home", "غرفة": "home", "شقة": "home",
+        "مكتب": "office", "شركة": "office", "مباحث": "office",
+        "سيارة": "outdoor", "خارجي": "outdoor",
+        "محطة": "media", "استوديو": "media",
+    }
+    LOCATION_KIND_RE = re.compile("|".join(LOCATION_KINDS))
+    # عند ذكر أكثر من نوع في الموقع يُعتمد الأعلى أولوية
+    LOCATION_KIND_PRIORITY = ("home", "office", "outdoor", "media")
+    # المفتاح: (نوع المكان, هل المشهد ليلي)
+    WARDROBE_RULES = {
+        ("home", True): "ملابس منزلية ليلية / بيجامة (مظهر استرخاء أو توتر حسب المشهد)",
+        ("home", False): "ملابس منزلية نهارية (Casual Home)",
+        ("office", True): "ملابس رسمية / Smart Casual (بدلة أو قميص)",
+        ("office", False): "ملابس رسمية / Smart Casual (بدلة أو قميص)",
+        ("outdoor", True): "ملابس خروج كاملة (حسب الطقس والطبقة الاجتماعية)",
+        ("outdoor", False): "ملابس خروج كاملة (حسب الطقس والطبقة الاجتماعية)",
+        ("media", True): "مظهر إعلامي / ملابس تصوير (Sartorial/TV Look)",
+        ("media", False): "مظهر إعلامي / ملابس تصوير (Sartorial/TV Look)",
+    }
+
+    # عدد المشاهد الذي يبدأ عنده التحليل المتوازي (تحت ذلك تكلفة العمليات أكبر من المكسب)
+    PARALLEL_MIN_SCENES = 2000
+
+    # كلمات تستلزم تصريح حقوق ملكية
+    MUSIC_RIGHTS_KEYWORDS = ["موسيقى", "عمرو دياب", "تامر حسني"]
+
+# ==========================================
+# 1.1 ماسح الكلمات المفتاحية (Keyword Scanner)
+# ==========================================
+
+# كل كلمة مفتاحية -> وسومها (prop / vehicle / note)؛ الكلمة الواحدة قد تحمل
+# أكثر من وسم (مثل "سيارة" فهي Prop ومركبة معاً)
+KEYWORD_TAGS: Dict[str, tuple] = {}
+for _key, _val in Config.PROPS_MAP.items():
+    KEYWORD_TAGS.setdefault(_key, ())
+    KEYWORD_TAGS[_key] += (("prop", _val),)
+for _word in Config.VEHICLES_KEYWORDS:
+    KEYWORD_TAGS.setdefault(_word, ())
+    KEYWORD_TAGS[_word] += (("vehicle", _word),)
+for _word in Config.MUSIC_RIGHTS_KEYWORDS:
+    KEYWORD_TAGS.setdefault(_word, ())
+    KEYWORD_TAGS[_word] += (("note", "music_rights"),)
+
+if AHOCORASICK_AVAILABLE:
+    KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for _word, _tags in KEYWORD_TAGS.items():
+        KEYWORD_AUTOMATON.add_word(_word, (len(_word), _tags))
+    KEYWORD_AUTOMATON.make_automaton()
+else:
+    # بديل: نمط واحد مُجمّع (الأطول أولاً) يُمسح به النص مرة واحدة
+    KEYWORD_RE = re.compile("|".join(map(re.escape, sorted(KEYWORD_TAGS, key=len, reverse=True))))
+
+def scan_keywords(text: str):
+    """يمسح النص مرة واحدة ويعيد (موضع البداية, الوسوم) لكل كلمة مفتاحية"""
+    if AHOCORASICK_AVAILABLE:
+        for end, (length, tags) in KEYWORD_AUTOMATON.iter(text):
+            yield end - length + 1, tags
+    else:
+        for m in KEYWORD_RE.finditer(text):
+            yield m.start(), KEYWORD_TAGS[m.group(0)]
+
 # ==========================================
 # 2. نماذج البيانات المتقدمة (Advanced Models)
 # ==========================================
 
-@dataclass
+# رموز الترقيم التي تُزال من أسماء الشخصيات
+_NAME_CLEAN_RE = re.compile(r'[^\w\s]+')
+
+@dataclass(slots=True)
 class SceneData:
     scene_number: str = ""
     int_ext: str = "غير محدد"
     day_night: str = "غير محدد"
     location: str = ""
-    characters: Set[str] = field(default_factory=set)
+    # القواميس تُستخدم كمجموعات مرتبة (بلا تكرار وبترتيب الظهور في النص)
+    characters: Dict[str, None] = field(default_factory=dict)
     action_summary: str = ""
     
     # حقول جديدة متخصصة
-    props: Set[str] = field(default_factory=set)
+    props: Dict[str, None] = field(default_factory=dict)
     wardrobe: str = ""
     makeup: str = "تصحيح كاميرا اعتيادي"
-    vehicles: Set[str] = field(default_factory=set)
+    vehicles: Dict[str, None] = field(default_factory=dict)
     extras: str = "غير مذكور (لا يلزم)"
     sound: str = "حوار مباشر"
     notes: List[str] = field(default_factory=list)
 
     def add_character(self, name: str):
+        # خروج مبكر قبل التنظيف: التنظيف لا يطيل الاسم، والاسم المحظور بلا رموز يبقى كما هو
+        if len(name) <= 2 or name in Config.CHAR_BLOCKLIST:
+            return
         # تنظيف الاسم
-        clean = re.sub(r'[^\w\s]', '', name).strip()
+        clean = _NAME_CLEAN_RE.sub('', name).strip()
         # التحقق من قائمة الحظر
-        if clean and clean not in Config.CHAR_BLOCKLIST and len(clean) > 2:
-            self.characters.add(clean)
+        if len(clean) > 2 and clean not in Config.CHAR_BLOCKLIST:
+            self.characters[clean] = None
 
 # ==========================================
 # 3. محرك الاستنتاج المنطقي (Inference Engine)
@@ -82,15 +165,26 @@ class InferenceEngine:
         # 1. استنتاج الأزياء (Wardrobe Logic)
         InferenceEngine._infer_wardrobe(scene)
         
-        # 2. استنتاج المركبات
-        for word in Config.VEHICLES_KEYWORDS:
-            if word in full_text:
-                scene.vehicles.add(word)
-                if "سيارة" in word:
-                     scene.notes.append("تنبيه: التأكد من موديل السيارة مناسب لزمن الأحداث (2009).")
+        # 2. مسح واحد للنص يستخرج الـ Props والمركبات والملاحظات
+        # الـ Props تُؤخذ من المتن فقط (بعد سطر الهيدر)
+        header_end = full_text.find('\n')
+        body_start = header_end + 1 if header_end != -1 else len(full_text)
+        music_rights = False
+        for start, tags in scan_keywords(full_text):
+            for kind, payload in tags:
+                if kind == "prop":
+                    if start >= body_start:
+                        scene.props[payload] = None
+                elif kind == "vehicle":
+                    scene.vehicles[payload] = None
+                else:
+                    music_rights = True
+
+        if "سيارة" in scene.vehicles:
+            scene.notes.append("تنبيه: التأكد من موديل السيارة مناسب لزمن الأحداث (2009).")
 
         # 3. استنتاج الملاحظات الإنتاجية
-        if "موسيقى" in full_text or "عمرو دياب" in full_text or "تامر حسني" in full_text:
+        if music_rights:
             scene.notes.append("حقوق ملكية: يلزم استخراج تصريح للأغاني أو أسماء المشاهير المذكورة.")
         
         if "أمن الدولة" in scene.location:
@@ -101,30 +195,16 @@ class InferenceEngine:
         """
         خوارزمية تحديد الملابس بناءً على المكان والزمان والشخصية
         """
-        loc = scene.location
-        time = scene.day_night
-        
-        wardrobe_desc = []
-        
-        # قواعد عامة
-        if "منزل" in loc or "غرفة" in loc or "شقة" in loc:
-            if "ليل" in time:
-                wardrobe_desc.append("ملابس منزلية ليلية / بيجامة (مظهر استرخاء أو توتر حسب المشهد)")
-            else:
-                wardrobe_desc.append("ملابس منزلية نهارية (Casual Home)")
+        # مرور واحد على الموقع يستخرج أنواع الأماكن المذكورة، ثم يُختار الأعلى أولوية
+        kinds = {Config.LOCATION_KINDS[token] for token in Config.LOCATION_KIND_RE.findall(scene.location)}
+        kind = next((k for k in Config.LOCATION_KIND_PRIORITY if k in kinds), None)
+        is_night = "ليل" in scene.day_night
         
-        elif "مكتب" in loc or "شركة" in loc or "مباحث" in loc:
-            wardrobe_desc.append("ملابس رسمية / Smart Casual (بدلة أو قميص)")
-            
-        elif "سيارة" in loc or "خارجي" in loc:
-            wardrobe_desc.append("ملابس خروج كاملة (حسب الطقس والطبقة الاجتماعية)")
-            
-        elif "محطة" in loc or "استوديو" in loc:
-             wardrobe_desc.append("مظهر إعلامي / ملابس تصوير (Sartorial/TV Look)")
+        wardrobe_desc = Config.WARDROBE_RULES.get((kind, is_night))
 
         # صياغة النتيجة
         if wardrobe_desc:
-            scene.wardrobe = " + ".join(wardrobe_desc) + " <span class='tag'>استنتاج تلقائي</span>"
+            scene.wardrobe = wardrobe_desc + " <span class='tag'>استنتاج تلقائي</span>"
         else:
             scene.wardrobe = "ملابس اعتيادية (يحددها الستايلست)"
 
@@ -133,78 +213,91 @@ class InferenceEngine:
 # ==========================================
 
 class RobustParser:
+    HEADER_CLEAN_PATTERN = re.compile(r'(ليل|نهار|داخلي|خارجي|-)')
     SCENE_HEADER_PATTERN = re.compile(r"^\s*(?:مشهد|Scene)\s*(\d+)\s*(.*)$", re.MULTILINE)
+    # اسم المتحدث قبل ":" (حتى 3 كلمات)، مع استبعاد كلمات قائمة الحظر مباشرة داخل النمط
+    SPEAKER_PATTERN = re.compile(
+        r"(?!(?:" + "|".join(map(re.escape, sorted(Config.CHAR_BLOCKLIST))) + r")[^\w:]*:)"
+        r"([^\s:]+(?:\s+[^\s:]+){0,2})\s*:"
+    )
 
     def __init__(self, text: str):
         self.text = text
 
     def parse(self) -> List[SceneData]:
-        scenes = []
         matches = list(self.SCENE_HEADER_PATTERN.finditer(self.text))
         
+        blocks = []
         for i, match in enumerate(matches):
             start = match.start()
             end = matches[i+1].start() if i + 1 < len(matches) else len(self.text)
-            block = self.text[start:end]
-            scenes.append(self._process_block(match, block))
-        return scenes
+            blocks.append((match.group(1), match.group(2), self.text[start:end]))
 
-    def _process_block(self, header, block) -> SceneData:
-        scene_num = header.group(1)
-        meta = header.group(2)
-        
+        # المشاهد مستقلة تماماً، فالسيناريوهات الطويلة تُوزع على عدة عمليات
+        if len(blocks) >= Config.PARALLEL_MIN_SCENES:
+            with ProcessPoolExecutor() as ex:
+                return list(ex.map(_process_block_standalone, blocks, chunksize=16))
+        return [self._process_block(*item) for item in blocks]
+
+    @staticmethod
+    def _process_block(scene_num: str, meta: str, block: str) -> SceneData:
         scene = SceneData(scene_number=scene_num)
         
-        # تحليل الهيدر
-        scene.day_night = "ليل" if "ليل" in meta else "نهار" if "نهار" in meta else "غير محدد"
-        scene.int_ext = "خارجي" if "خارجي" in meta else "داخلي"
+        # تحليل الهيدر في مرور واحد: نفس التطابق الذي ينظف الموقع
+        # يسجّل كلمات الزمان والمكان الموجودة
+        tokens = set()
+        raw_loc = RobustParser.HEADER_CLEAN_PATTERN.sub(lambda m: tokens.add(m.group(0)) or '', meta).strip()
+        scene.day_night = "ليل" if "ليل" in tokens else "نهار" if "نهار" in tokens else "غير محدد"
+        scene.int_ext = "خارجي" if "خارجي" in tokens else "داخلي"
         
-        # استخراج الموقع (تنظيف الهيدر)
-        raw_loc = re.sub(r'(ليل|نهار|داخلي|خارجي|-)', '', meta).strip()
         lines = block.split('\n')
         if len(raw_loc) > 3:
             scene.location = raw_loc
         elif len(lines) > 1:
             scene.location = lines[1].strip() # افتراض السطر التالي هو المكان
 
-        # تحليل المتن (الشخصيات والـ Props)
+        # تحليل المتن (الشخصيات والملخص) في مرور واحد على كل سطر
+        # الملخص يحتاج أول سطرين وصفيين فقط، فلا نجمع أكثر منهما
         desc_lines = []
-        for line in lines[1:]:
+        add_character = scene.add_character
+        speaker_match = RobustParser.SPEAKER_PATTERN.match
+        body = iter(lines)
+        next(body, None)
+        for line in body:
             line = line.strip()
             if not line: continue
             
             # استخراج شخصيات (قواعد أكثر صرامة)
             # الاسم عادة يكون كلمة أو كلمتين في بداية السطر
             # أو مفصول بـ ":"
+            # نمط المتحدث يرفض كلمات الحظر ويشترط ألا يزيد الاسم عن 3 كلمات
             if ":" in line:
-                potential_name = line.split(":")[0].strip()
-                if len(potential_name.split()) <= 3: # الاسم لا يزيد عن 3 كلمات
-                    scene.add_character(potential_name)
-            
-            # البحث عن Props
-            for key, val in Config.PROPS_MAP.items():
-                if key in line:
-                    scene.props.add(val)
-
+                speaker = speaker_match(line)
+                if speaker:
+                    add_character(speaker.group(1))
             # تجميع الملخص (تجاهل سطور الحوار القصيرة)
-            if len(line) > 20 and ":" not in line:
+            elif len(line) > 20 and len(desc_lines) < 2:
                 desc_lines.append(line)
 
         # تحسين الملخص
-        scene.action_summary = " ".join(desc_lines[:2]) + "..." if desc_lines else "حوار درامي"
+        scene.action_summary = " ".join(desc_lines) + "..." if desc_lines else "حوار درامي"
         
-        # تشغيل محرك الاستنتاج لإكمال البيانات الناقصة
+        # تشغيل محرك الاستنتاج لإكمال البيانات الناقصة (ومنها الـ Props)
         InferenceEngine.enrich_scene(scene, block)
         
         return scene
 
+def _process_block_standalone(item) -> SceneData:
+    """نقطة دخول على مستوى الوحدة لعمليات الـ ProcessPool (item = (رقم, هيدر, نص))"""
+    return RobustParser._process_block(*item)
+
 # ==========================================
 # 5. محرك العرض (Visual Engine - CSS Upgrade)
 # ==========================================
 
 class HTMLRenderer:
     # CSS مطابق تماماً للملف الاحترافي (الملف الثاني)
-    CSS = """
+    CSS = re.sub(r'\s+', ' ', """
     :root{ --ink:#111; --muted:#666; --soft:#f3f4f6; --soft2:#fafafa; --accent:#0f172a; --line: rgba(0,0,0,0.16); --line2: rgba(0,0,0,0.10); --tagbg:#eef2ff; --tagbd:#c7d2fe; --tagtx:#1e3a8a; }
     html, body { padding: 0; margin: 0; color: var(--ink); background: var(--soft2); font-family: "Tahoma", "Arial", sans-serif; direction: rtl; -webkit-print-color-adjust: exact; print-color-adjust: exact; }
     @page { size: A4; margin: 12mm; }
@@ -223,61 +316,41 @@ class HTMLRenderer:
     .sheet-footer{ margin-top: auto; display: flex; justify-content: space-between; align-items: center; padding-top: 8px; border-top: 1px dashed rgba(0,0,0,0.25); font-size: 11px; color: var(--muted); }
     @media print{ body{ background:#fff; } .sheet{ margin: 0; width: auto; border: none; box-shadow: none; padding: 0; } }
     .bullets { margin: 0; padding-right: 20px; }
-    """
+    """).strip()
+    # وسم الـ style يُبنى مرة واحدة ويُعاد استخدامه في كل تقرير
+    STYLE_BLOCK = f"<style>{CSS}</style>"
 
-    @staticmethod
-    def render(scenes: List[SceneData]) -> str:
-        html_body = ""
-        total = len(scenes)
-        
-        for i, scene in enumerate(scenes, 1):
-            # تنسيق القوائم
-            chars = ", ".join(sorted(scene.characters)) if scene.characters else "غير محدد"
-            
-            props_list = ""
-            if scene.props:
-                props_list = '<ul class="bullets">' + "".join([f"<li>{p}</li>" for p in scene.props]) + "</ul>"
-            else:
-                props_list = "لا يوجد (حسب النص)"
-
-            vehicles_str = ", ".join(scene.vehicles) if scene.vehicles else "لا يوجد"
-            
-            notes_html = ""
-            if scene.notes:
-                notes_html = '<ul class="bullets" style="color:#b91c1c;">' + "".join([f"<li>{n}</li>" for n in scene.notes]) + "</ul>"
-            else:
-                notes_html = "مراجعة الراكورات (Continuity)"
-
-            html_body += f"""
+    # قالب ورقة المشهد ثابت، فيُعرّف مرة واحدة وتُملأ حقوله لكل مشهد
+    SHEET_TEMPLATE = """
             <section class="sheet">
                 <header class="sheet-header">
                     <div class="sheet-header-top">
-                        <div class="sheet-title">Breakdown Sheet — مشهد {scene.scene_number}</div>
+                        <div class="sheet-title">Breakdown Sheet — مشهد {scene_number}</div>
                         <div class="sheet-badge">Production Ready</div>
                     </div>
                     <div class="sheet-meta">
-                        <div><span class="meta-label">INT/EXT:</span> {scene.int_ext}</div>
-                        <div><span class="meta-label">Time:</span> {scene.day_night}</div>
-                        <div><span class="meta-label">Location:</span> {scene.location}</div>
+                        <div><span class="meta-label">INT/EXT:</span> {int_ext}</div>
+                        <div><span class="meta-label">Time:</span> {day_night}</div>
+                        <div><span class="meta-label">Location:</span> {location}</div>
                     </div>
                 </header>
 
                 <table class="sheet-table">
                     <thead><tr><th>Element</th><th>Details</th></tr></thead>
                     <tbody>
-                        <tr><td class="field">Scene No</td><td>{scene.scene_number}</td></tr>
-                        <tr><td class="field">Synopsis</td><td>{scene.action_summary}</td></tr>
+                        <tr><td class="field">Scene No</td><td>{scene_number}</td></tr>
+                        <tr><td class="field">Synopsis</td><td>{action_summary}</td></tr>
                         
                         <tr><td class="field">Cast</td><td>{chars}</td></tr>
-                        <tr><td class="field">Extras</td><td>{scene.extras}</td></tr>
+                        <tr><td class="field">Extras</td><td>{extras}</td></tr>
                         
-                        <tr><td class="field">Wardrobe</td><td>{scene.wardrobe}</td></tr>
-                        <tr><td class="field">Makeup</td><td>{scene.makeup}</td></tr>
+                        <tr><td class="field">Wardrobe</td><td>{wardrobe}</td></tr>
+                        <tr><td class="field">Makeup</td><td>{makeup}</td></tr>
                         
                         <tr><td class="field">Props</td><td>{props_list}</td></tr>
                         <tr><td class="field">Vehicles</td><td>{vehicles_str}</td></tr>
                         
-                        <tr><td class="field">Sound</td><td>{scene.sound}</td></tr>
+                        <tr><td class="field">Sound</td><td>{sound}</td></tr>
                         <tr><td class="field">Notes / Legal</td><td>{notes_html}</td></tr>
                     </tbody>
                 </table>
@@ -288,42 +361,111 @@ class HTMLRenderer:
                 </footer>
             </section>
             """
-            
-        return f"""<!doctype html>
+
+    @staticmethod
+    def render(scenes: List[SceneData], css_href: Optional[str] = None) -> str:
+        return "".join(HTMLRenderer.iter_render(scenes, css_href))
+
+    @staticmethod
+    def iter_render(scenes: List[SceneData], css_href: Optional[str] = None) -> Iterator[str]:
+        """توليد التقرير على أجزاء (المقدمة، ثم ورقة لكل مشهد، ثم الخاتمة) للكتابة المتدفقة"""
+        total = len(scenes)
+        yield f"""<!doctype html>
         <html lang="ar" dir="rtl">
         <head><meta charset="utf-8"><title>Production Breakdown</title>
-        <style>{HTMLRenderer.CSS}</style>
-        </head><body>{html_body}</body></html>"""
+        {f'<link rel="stylesheet" href="{css_href}">' if css_href else HTMLRenderer.STYLE_BLOCK}
+        </head><body>"""
+        
+        for i, scene in enumerate(scenes, 1):
+            # تنسيق القوائم (نص السيناريو يُهرَّب قبل إدراجه في الـ HTML)
+            chars = escape(", ".join(scene.characters)) if scene.characters else "غير محدد"
+            
+            props_list = ""
+            if scene.props:
+                props_list = '<ul class="bullets">' + "".join([f"<li>{escape(p)}</li>" for p in scene.props]) + "</ul>"
+            else:
+                props_list = "لا يوجد (حسب النص)"
+
+            vehicles_str = escape(", ".join(scene.vehicles)) if scene.vehicles else "لا يوجد"
+            
+            notes_html = ""
+            if scene.notes:
+                notes_html = '<ul class="bullets" style="color:#b91c1c;">' + "".join([f"<li>{escape(n)}</li>" for n in scene.notes]) + "</ul>"
+            else:
+                notes_html = "مراجعة الراكورات (Continuity)"
+
+            yield HTMLRenderer.SHEET_TEMPLATE.format_map({
+                "scene_number": escape(scene.scene_number),
+                "int_ext": scene.int_ext,
+                "day_night": scene.day_night,
+                "location": escape(scene.location),
+                "action_summary": escape(scene.action_summary),
+                "chars": chars,
+                "extras": scene.extras,
+                "wardrobe": scene.wardrobe,
+                "makeup": scene.makeup,
+                "props_list": props_list,
+                "vehicles_str": vehicles_str,
+                "sound": scene.sound,
+                "notes_html": notes_html,
+                "i": i,
+                "total": total,
+            })
+
+        yield "</body></html>"
 
 # ==========================================
 # 6. التنفيذ (Execution)
 # ==========================================
 
-async def main():
-    logger.info("Initializing Logic Engine...")
-    
+async def write_css_once(output_dir: str) -> None:
+    """كتابة ملف الـ CSS المشترك مرة واحدة لكل مجلد مخرجات (وضع الدفعات)"""
+    async with aiofiles.open(os.path.join(output_dir, Config.CSS_FILE), 'wb') as f:
+        await f.write(HTMLRenderer.CSS.encode('utf-8'))
+
+async def process_script(input_file: str, output_file: str, css_href: Optional[str] = None) -> None:
     # قراءة الملف
     try:
-        async with aiofiles.open(Config.INPUT_FILE, 'r', encoding='utf-8') as f:
+        async with aiofiles.open(input_file, 'r', encoding='utf-8') as f:
             content = await f.read()
     except FileNotFoundError:
-        logger.error("ملف السيناريو غير موجود.")
+        logger.error(f"ملف السيناريو غير موجود: {input_file}")
         return
 
-    # التحليل + الاستنتاج
-    parser = RobustParser(content)
-    scenes = parser.parse()
+    # التحليل + الاستنتاج (عمل CPU خالص يُنقل خارج حلقة الأحداث)
+    scenes = await asyncio.to_thread(lambda: RobustParser(content).parse())
     
     if not scenes:
-        logger.warning("لم يتم استخراج أي مشاهد.")
+        logger.warning(f"لم يتم استخراج أي مشاهد من {input_file}.")
         return
         
-    logger.info(f"تم تحليل {len(scenes)} مشهد وتطبيق قواعد الاستنتاج عليها.")
+    logger.info(f"تم تحليل {len(scenes)} مشهد من {input_file} وتطبيق قواعد الاستنتاج عليها.")
+
+    # التوليد والكتابة المتدفقة: ورقة مشهد واحدة في الذاكرة في كل لحظة
+    async with aiofiles.open(output_file, 'wb') as f:
+        for chunk in HTMLRenderer.iter_render(scenes, css_href):
+            await f.write(chunk.encode('utf-8'))
+
+async def main():
+    logger.info("Initializing Logic Engine...")
 
-    # التوليد
-    html = HTMLRenderer.render(scenes)
-    async with aiofiles.open(Config.OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        await f.write(html)
+    # يمكن تمرير عدة سيناريوهات من سطر الأوامر فتُعالج بالتوازي
+    args = sys.argv[1:]
+    inline_css = "--inline-css" in args
+    input_files = [a for a in args if a != "--inline-css"] or [Config.INPUT_FILE]
+    if len(input_files) == 1:
+        jobs = [(input_files[0], Config.OUTPUT_FILE)]
+    else:
+        jobs = [(path, os.path.splitext(path)[0] + "_breakdown.html") for path in input_files]
+
+    # في وضع الدفعات تشترك التقارير في ملف CSS واحد بدلاً من تضمينه في كل تقرير
+    css_href = None
+    if len(jobs) > 1 and not inline_css:
+        css_href = Config.CSS_FILE
+        output_dirs = {os.path.dirname(dst) or "." for _, dst in jobs}
+        await asyncio.gather(*(write_css_once(d) for d in output_dirs))
+
+    await asyncio.gather(*(process_script(src, dst, css_href) for src, dst in jobs))
         
     logger.info("CASE CLOSED: تم إنشاء التقرير الاحترافي.")
 
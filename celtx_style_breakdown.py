@@ -8,15 +8,28 @@ Professional Breakdown System with Celtx-Style A4 Sheets
 import asyncio
 import re
 import aiofiles
+from html import escape
 from dataclasses import dataclass, field
-from typing import List, Set, Dict
+from typing import Iterator, List, Set, Dict
 from datetime import datetime
 
+# ==========================================
+# الأنماط المُجمّعة مسبقاً
+# ==========================================
+
+_LOC_CLEAN_RE = re.compile(r'(مشهد|Scene|\d+|داخلي|خارجي|INT|EXT|ليل|نهار|DAY|NIGHT|-)')
+_SCENE_NUM_RE = re.compile(r'مشهد\s*(\d+)', re.IGNORECASE)
+_DIALOGUE_RE = re.compile(r'([A-Za-z\u0600-\u06FF\s]+):')
+
+PROP_KEYWORDS = ['لابتوب', 'موبايل', 'هاتف', 'ظرف', 'كاسيت', 'كرسي متحرك', 'مجلات']
+_PROP_KW_RE = re.compile('|'.join(map(re.escape, PROP_KEYWORDS)), re.IGNORECASE)
+_VEH_KW_RE = re.compile('سيارة|عربية|تاكسي', re.IGNORECASE)
+
 # ==========================================
 # نماذج البيانات
 # ==========================================
 
-@dataclass
+@dataclass(slots=True)
 class SceneBreakdown:
     """Breakdown Sheet لمشهد واحد"""
     scene_number: str
@@ -55,19 +68,14 @@ class ScriptParser:
         """تحليل السيناريو الكامل"""
         scenes = []
         
-        # تقسيم حسب المشاهد
-        scene_pattern = re.compile(r'مشهد\s*(\d+)', re.IGNORECASE)
-        scene_blocks = re.split(r'(?=مشهد\s*\d+)', content)
+        # تحديد بدايات المشاهد مباشرة من مواضع التطابق بدلاً من تقسيم النص
+        matches = list(_SCENE_NUM_RE.finditer(content))
         
-        for block in scene_blocks:
-            if not block.strip():
-                continue
-            
-            match = scene_pattern.search(block)
-            if match:
-                scene_num = match.group(1)
-                scene = ScriptParser._parse_scene(block, scene_num)
-                scenes.append(scene)
+        for i, match in enumerate(matches):
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(content)
+            block = content[match.start():end]
+            scene = ScriptParser._parse_scene(block, match.group(1))
+            scenes.append(scene)
         
         return scenes
     
@@ -110,7 +118,7 @@ class ScriptParser:
     def _extract_location(header: str) -> str:
         """استخراج الموقع"""
         # إزالة الكلمات الشائعة
-        location = re.sub(r'(مشهد|Scene|\d+|داخلي|خارجي|INT|EXT|ليل|نهار|DAY|NIGHT|-)', '', header)
+        location = _LOC_CLEAN_RE.sub('', header)
         return location.strip() or "غير محدد"
     
     @staticmethod
@@ -131,8 +139,7 @@ class ScriptParser:
         cast = []
         
         # البحث عن أسماء قبل ":"
-        dialogue_pattern = r'([A-Za-z\u0600-\u06FF\s]+):'
-        matches = re.findall(dialogue_pattern, text)
+        matches = _DIALOGUE_RE.findall(text)
         
         for match in matches:
             name = match.strip()
@@ -145,15 +152,18 @@ class ScriptParser:
     @staticmethod
     def _infer_elements(scene: SceneBreakdown, text: str) -> None:
         """استنتاج العناصر من النص"""
-        text_lower = text.lower()
+        # الكلمات المفتاحية عربية لا حالة لها، فيُفحص النص مباشرة دون نسخة مصغّرة
+        location = scene.location
+        is_home = "منزل" in location
+        is_office = "مكتب" in location
         
         # Extras
         scene.extras = '<span class="muted">غير مذكور</span> (يُفترض لا يوجد)'
         
         # Costumes
-        if scene.day_night == "ليل" and "منزل" in scene.location.lower():
+        if scene.day_night == "ليل" and is_home:
             scene.costumes = 'ملابس منزلية ليلية / بيجامة <span class="tag">مستنتج من السياق</span>'
-        elif "مكتب" in scene.location.lower():
+        elif is_office:
             scene.costumes = 'ملابس رسمية / Smart Casual <span class="tag">مستنتج من السياق</span>'
         else:
             scene.costumes = 'ملابس اعتيادية <span class="tag">مستنتج من السياق</span>'
@@ -161,25 +171,20 @@ class ScriptParser:
         # Makeup
         scene.makeup = 'مكياج كاميرا اعتيادي <span class="tag">مستنتج من السياق</span>'
         
-        # Props
-        props = []
-        prop_keywords = ['لابتوب', 'موبايل', 'هاتف', 'ظرف', 'كاسيت', 'كرسي متحرك', 'مجلات']
-        for prop in prop_keywords:
-            if prop in text_lower:
-                props.append(prop)
+        # Props (مسح واحد للنص، والترتيب حسب قائمة الكلمات)
+        hits = set(_PROP_KW_RE.findall(text))
+        props = [prop for prop in PROP_KEYWORDS if prop in hits]
         
         scene.props = '، '.join(props) if props else '<span class="muted">غير مذكور</span>'
         
         # Set Dressing
-        if "منزل" in scene.location.lower():
-            scene.set_dressing = f'{scene.location} <span class="tag">مستنتج من السياق</span>'
-        elif "مكتب" in scene.location.lower():
+        if is_office and not is_home:
             scene.set_dressing = f'مكتب احترافي <span class="tag">مستنتج من السياق</span>'
         else:
-            scene.set_dressing = f'{scene.location} <span class="tag">مستنتج من السياق</span>'
+            scene.set_dressing = f'{escape(scene.location)} <span class="tag">مستنتج من السياق</span>'
         
         # Vehicles
-        if any(v in text_lower for v in ['سيارة', 'عربية', 'تاكسي']):
+        if _VEH_KW_RE.search(text):
             scene.vehicles = "سيارة"
         
         # Sound
@@ -192,7 +197,7 @@ class ScriptParser:
         scene.camera_lighting = f"{scene.day_night} {scene.int_ext.split()[0]}"
         
         # Special Effects
-        if "شاشة" in text_lower or "لابتوب" in text_lower:
+        if "لابتوب" in hits or "شاشة" in text:
             scene.special_effects = "تشغيل شاشة (Playback)"
 
 
@@ -203,7 +208,7 @@ class ScriptParser:
 class CeltxStyleRenderer:
     """محرك عرض بتصميم Celtx الاحترافي"""
     
-    CSS = """
+    CSS = re.sub(r'\s+', ' ', """
     /* ===== Print: A4 ===== */
     @page { size: A4; margin: 12mm; }
 
@@ -390,48 +395,45 @@ class CeltxStyleRenderer:
       }
       .sheet-header, .sheet-table{ border-color: rgba(0,0,0,0.25); }
     }
-    """
+    """).strip()
+    # وسم الـ style يُبنى مرة واحدة ويُعاد استخدامه في كل تقرير
+    STYLE_BLOCK = f"<style>{CSS}</style>"
     
-    @staticmethod
-    def render_scene(scene: SceneBreakdown, total_scenes: int) -> str:
-        """عرض مشهد واحد"""
-        
-        cast_text = "، ".join(scene.cast) if scene.cast else '<span class="muted">غير مذكور</span>'
-        
-        return f"""
+    # قالب ورقة المشهد ثابت، فيُعرّف مرة واحدة وتُملأ حقوله لكل مشهد
+    SHEET_TEMPLATE = """
   <section class="sheet">
     <header class="sheet-header">
       <div class="sheet-header-top">
-        <div class="sheet-title">Breakdown Sheet — مشهد {scene.scene_number}</div>
+        <div class="sheet-title">Breakdown Sheet — مشهد {scene_number}</div>
         <div class="sheet-badge">A4 Ready</div>
       </div>
       <div class="sheet-meta">
-        <div class="meta-item"><span class="meta-label">INT/EXT:</span><span>{scene.int_ext}</span></div>
-        <div class="meta-item"><span class="meta-label">نهار/ليل:</span><span>{scene.day_night}</span></div>
-        <div class="meta-item"><span class="meta-label">الموقع:</span><span>{scene.location}</span></div>
+        <div class="meta-item"><span class="meta-label">INT/EXT:</span><span>{int_ext}</span></div>
+        <div class="meta-item"><span class="meta-label">نهار/ليل:</span><span>{day_night}</span></div>
+        <div class="meta-item"><span class="meta-label">الموقع:</span><span>{location}</span></div>
       </div>
     </header>
 
     <table class="sheet-table">
       <thead><tr><th>الحقل</th><th>التفاصيل</th></tr></thead>
       <tbody>
-        <tr><td class="field">رقم المشهد</td><td class="value">{scene.scene_number}</td></tr>
-        <tr><td class="field">ملخص الحدث</td><td class="value">{scene.summary}</td></tr>
+        <tr><td class="field">رقم المشهد</td><td class="value">{scene_number}</td></tr>
+        <tr><td class="field">ملخص الحدث</td><td class="value">{summary}</td></tr>
         <tr><td class="field">طاقم التمثيل / Cast</td><td class="value">{cast_text}</td></tr>
-        <tr><td class="field">الممثلون الإضافيون / Extras</td><td class="value">{scene.extras}</td></tr>
-        <tr><td class="field">الأزياء / Costumes</td><td class="value">{scene.costumes}</td></tr>
-        <tr><td class="field">المكياج / Makeup</td><td class="value">{scene.makeup}</td></tr>
-        <tr><td class="field">الدعائم / Props</td><td class="value">{scene.props}</td></tr>
-        <tr><td class="field">ديكورات الموقع / Set Dressings</td><td class="value">{scene.set_dressing}</td></tr>
-        <tr><td class="field">الحيوانات / Animals</td><td class="value">{scene.animals}</td></tr>
-        <tr><td class="field">المركبات / Vehicles</td><td class="value">{scene.vehicles}</td></tr>
-        <tr><td class="field">المساحات الخضراء / Greenery</td><td class="value">{scene.greenery}</td></tr>
-        <tr><td class="field">المشاهد الخطرة / Stunts</td><td class="value">{scene.stunts}</td></tr>
-        <tr><td class="field">المؤثرات الخاصة / Special Effects</td><td class="value">{scene.special_effects}</td></tr>
-        <tr><td class="field">المؤثرات البصرية / Visual Effects</td><td class="value">{scene.visual_effects}</td></tr>
-        <tr><td class="field">الصوت / Sound</td><td class="value">{scene.sound}</td></tr>
-        <tr><td class="field">التصوير والإضاءة / Camera & Lighting</td><td class="value">{scene.camera_lighting}</td></tr>
-        <tr><td class="field">ملاحظات (Wardrobe/Notes)</td><td class="value">{scene.notes if scene.notes else "لا توجد ملاحظات نصية إضافية."}</td></tr>
+        <tr><td class="field">الممثلون الإضافيون / Extras</td><td class="value">{extras}</td></tr>
+        <tr><td class="field">الأزياء / Costumes</td><td class="value">{costumes}</td></tr>
+        <tr><td class="field">المكياج / Makeup</td><td class="value">{makeup}</td></tr>
+        <tr><td class="field">الدعائم / Props</td><td class="value">{props}</td></tr>
+        <tr><td class="field">ديكورات الموقع / Set Dressings</td><td class="value">{set_dressing}</td></tr>
+        <tr><td class="field">الحيوانات / Animals</td><td class="value">{animals}</td></tr>
+        <tr><td class="field">المركبات / Vehicles</td><td class="value">{vehicles}</td></tr>
+        <tr><td class="field">المساحات الخضراء / Greenery</td><td class="value">{greenery}</td></tr>
+        <tr><td class="field">المشاهد الخطرة / Stunts</td><td class="value">{stunts}</td></tr>
+        <tr><td class="field">المؤثرات الخاصة / Special Effects</td><td class="value">{special_effects}</td></tr>
+        <tr><td class="field">المؤثرات البصرية / Visual Effects</td><td class="value">{visual_effects}</td></tr>
+        <tr><td class="field">الصوت / Sound</td><td class="value">{sound}</td></tr>
+        <tr><td class="field">التصوير والإضاءة / Camera & Lighting</td><td class="value">{camera_lighting}</td></tr>
+        <tr><td class="field">ملاحظات (Wardrobe/Notes)</td><td class="value">{notes}</td></tr>
       </tbody>
     </table>
 
@@ -441,24 +443,62 @@ class CeltxStyleRenderer:
     </footer>
   </section>
 """
+
+    @staticmethod
+    def render_scene(scene: SceneBreakdown, total_scenes: int) -> str:
+        """عرض مشهد واحد"""
+        
+        # نص السيناريو يُهرَّب قبل إدراجه في الـ HTML
+        cast_text = escape("، ".join(scene.cast)) if scene.cast else '<span class="muted">غير مذكور</span>'
+        
+        return CeltxStyleRenderer.SHEET_TEMPLATE.format_map({
+            "scene_number": escape(scene.scene_number),
+            "int_ext": scene.int_ext,
+            "day_night": scene.day_night,
+            "location": escape(scene.location),
+            "summary": escape(scene.summary),
+            "cast_text": cast_text,
+            "extras": scene.extras,
+            "costumes": scene.costumes,
+            "makeup": scene.makeup,
+            "props": scene.props,
+            "set_dressing": scene.set_dressing,
+            "animals": scene.animals,
+            "vehicles": scene.vehicles,
+            "greenery": scene.greenery,
+            "stunts": scene.stunts,
+            "special_effects": scene.special_effects,
+            "visual_effects": scene.visual_effects,
+            "sound": scene.sound,
+            "camera_lighting": scene.camera_lighting,
+            "notes": scene.notes if scene.notes else "لا توجد ملاحظات نصية إضافية.",
+            "total_scenes": total_scenes,
+        })
     
     @staticmethod
     def render_full_report(scenes: List[SceneBreakdown]) -> str:
         """عرض التقرير الكامل"""
+        return "".join(CeltxStyleRenderer.iter_full_report(scenes))
+    
+    @staticmethod
+    def iter_full_report(scenes: List[SceneBreakdown]) -> Iterator[str]:
+        """عرض التقرير الكامل على أجزاء للكتابة المتدفقة"""
         
         total_scenes = len(scenes)
-        scenes_html = "".join([CeltxStyleRenderer.render_scene(s, total_scenes) for s in scenes])
         
-        return f"""<!doctype html>
+        yield f"""<!doctype html>
 <html lang="ar" dir="rtl">
 <head>
   <meta charset="utf-8" />
   <meta name="viewport" content="width=device-width, initial-scale=1" />
   <title>Breakdown Sheets — Scenes 1–{total_scenes}</title>
-  <style>{CeltxStyleRenderer.CSS}</style>
+  {CeltxStyleRenderer.STYLE_BLOCK}
 </head>
 <body>
-{scenes_html}
+"""
+        for s in scenes:
+            yield CeltxStyleRenderer.render_scene(s, total_scenes)
+        yield """
 </body>
 </html>"""
 
@@ -488,12 +528,10 @@ async def main():
     
     print(f"📝 Parsed {len(scenes)} scenes")
     
-    # توليد التقرير
-    html = CeltxStyleRenderer.render_full_report(scenes)
-    
-    # حفظ الملف
-    async with aiofiles.open("breakdown_sheets_a4.html", 'w', encoding='utf-8') as f:
-        await f.write(html)
+    # توليد التقرير وحفظه بشكل متدفق (ورقة مشهد واحدة في الذاكرة في كل لحظة)
+    async with aiofiles.open("breakdown_sheets_a4.html", 'wb') as f:
+        for chunk in CeltxStyleRenderer.iter_full_report(scenes):
+            await f.write(chunk.encode('utf-8'))
     
     print("✅ Breakdown Sheets generated: breakdown_sheets_a4.html")
     print(f"📊 Total scenes: {len(scenes)}")
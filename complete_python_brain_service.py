@@ -9,19 +9,26 @@ Advanced Python Brain Service for Three-Read Breakdown System - Complete Version
 from fastapi import FastAPI, HTTPException, BackgroundTasks, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional, Union, Literal
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Dict, Any, Optional, Tuple, Union, Literal
 from enum import Enum
 import uuid
 import asyncio
 import time
+import io
 import json
 import logging
+import os
+import re
 from datetime import datetime
 import traceback
+import atexit
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 import psutil
-from collections import defaultdict, deque
-from threading import Lock
+import heapq
+import numpy as np
+from collections import Counter, deque
 
 # إعداد التسجيل المحسن
 logging.basicConfig(
@@ -30,6 +37,39 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# نمط رؤوس المشاهد مُجمَّع مرة واحدة على مستوى الوحدة؛ يطابق بداية السطر بعد
+# المسافات البادئة فقط (دون تجاوز فواصل الأسطر) بما يكافئ line.strip().startswith
+SCENE_HEADER_RE = re.compile(r'^[^\S\n]*(?:INT\.|EXT\.|FADE IN:|CUT TO:|FADE OUT:)', re.MULTILINE)
+
+# حدود فئات توزيع درجات الثقة/الأهمية
+CONFIDENCE_BINS = (0.0, 0.25, 0.5, 0.75, 1.0)
+
+# أوزان أبعاد أهمية المشهد (نفس أوزان production_ready_python_service)
+SCENE_SCORE_WEIGHTS = {
+    "character_development": 0.25,
+    "plot_advancement": 0.35,
+    "emotional_impact": 0.25,
+    "visual_complexity": 0.15
+}
+
+# توصيات للأبعاد الضعيفة (درجة أقل من 0.3)
+SCENE_RECOMMENDATIONS = {
+    "character_development": "تعزيز حضور الشخصيات وتفاعلها في المشهد",
+    "plot_advancement": "ربط المشهد بتقدم الحبكة الرئيسية",
+    "emotional_impact": "تعميق اللحظات العاطفية في المشهد",
+    "visual_complexity": "إضافة عناصر بصرية تدعم السرد"
+}
+
+# كلمات دالة على الشحنة العاطفية
+EMOTIONAL_WORDS = frozenset({
+    "love", "hate", "fear", "cry", "cries", "scream", "screams", "angry", "afraid",
+    "tears", "laugh", "laughs", "kiss", "dies", "death", "shocked",
+    "حب", "كره", "خوف", "يبكي", "تبكي", "يصرخ", "تصرخ", "غضب", "دموع", "موت"
+})
+
+# قيمة فارغة ثابتة مشتركة لحقول المشهد التي لم يُعثر لها على عناصر (للقراءة فقط)
+EMPTY_SCENE_ITEMS: tuple = ()
+
 # ═══════════════════════════════════════════════════════════════════════════
 # نماذج البيانات المحسنة
 # ═══════════════════════════════════════════════════════════════════════════
@@ -60,6 +100,9 @@ class Priority(str, Enum):
     HIGH = "high"
     URGENT = "urgent"
 
+# أوزان الأولوية لترتيب قائمة الانتظار (ثابتة، فتُبنى مرة واحدة)
+PRIORITY_WEIGHTS: Dict[str, int] = {"low": 1, "normal": 2, "high": 3, "urgent": 4}
+
 class Evidence(BaseModel):
     """أدلة التحليل"""
     span_start: int = Field(..., ge=0)
@@ -97,6 +140,9 @@ class JobResponse(BaseModel):
 
 class AnalysisResult(BaseModel):
     """نتيجة التحليل"""
+    # سجل المهمة يُحدَّث مع كل تغيير حالة؛ الإسناد لا يعيد التحقق (التحقق عند الإنشاء فقط)
+    model_config = ConfigDict(validate_assignment=False)
+    
     job_id: str
     status: JobStatus
     component: ProcessingComponent
@@ -139,10 +185,22 @@ class AnalyticsReport(BaseModel):
 class AdvancedJobManager:
     """مدير المهام المتقدم مع مراقبة شاملة"""
     
-    def __init__(self, max_concurrent_jobs: int = 10):
+    def __init__(self, max_concurrent_jobs: int = 10, max_finished_jobs: int = 10000):
         self.jobs: Dict[str, AnalysisResult] = {}
+        # المهام المنتهية بترتيب انتهائها؛ الأقدم يُحذف عند تجاوز الحد
+        self.max_finished_jobs = max_finished_jobs
+        self._finished_order: deque = deque()
+        # عدادات التحليلات تُحدَّث مع كل إنشاء/تحديث/حذف بدلاً من المرور على كل المهام
+        self.component_usage: Counter = Counter()
+        self.priority_distribution: Counter = Counter()
+        self.confidence_sum = 0.0
+        self.confidence_count = 0
         self.active_jobs: Dict[str, asyncio.Task] = {}
-        self.job_queue: List[str] = []
+        # قائمة الانتظار كـ heap بمفاتيح (-الأولوية, التسلسل, المعرف)؛ الحذف كسول:
+        # المهمة تُزال من _queued فقط، ويُتخلص من مدخلها عند وصوله لقمة الـ heap
+        self._heap: List[tuple] = []
+        self._queued: Dict[str, tuple] = {}
+        self._seq = 0
         self.max_concurrent_jobs = max_concurrent_jobs
         self.job_counts = {
             "pending": 0, "processing": 0, "completed": 0, 
@@ -150,97 +208,156 @@ class AdvancedJobManager:
         }
         self.processing_times = deque(maxlen=1000)
         self.job_priorities = {}
-        self.job_start_times = {}
+        self.job_created_ts: Dict[str, float] = {}  # وقت الإنشاء كرقم لمفاتيح الترتيب
+        self.job_start_times: Dict[str, float] = {}  # time.monotonic() عند بدء المعالجة
+        # حدث لكل مهمة يُضبط عند انتهائها، لينتظره العملاء بدلاً من الاستعلام المتكرر
+        self.job_events: Dict[str, asyncio.Event] = {}
         self.metrics_history = deque(maxlen=100)
         self.start_time = datetime.now()
-        self.lock = Lock()
+        self._start_monotonic = time.monotonic()  # لحساب مدة التشغيل دون إنشاء datetime
+        self.lock = asyncio.Lock()
         
-    def create_job(self, request: AdvancedAnalysisRequest) -> str:
-        """إنشاء مهمة جديدة مع إدارة الأولوية"""
-        with self.lock:
-            job_id = str(uuid.uuid4())
-            
-            job_result = AnalysisResult(
-                job_id=job_id,
-                status=JobStatus.PENDING,
-                component=request.component,
-                result={},
-                evidence=[],
-                confidence_score=0.0,
-                processing_time_ms=0.0,
-                created_at=datetime.now(),
-                metadata={
-                    "priority": request.priority.value,
-                    "iterations": request.max_iterations,
-                    "revolutionary_mode": request.revolutionary_mode,
-                    "quantum_analysis": request.quantum_analysis,
-                    "neuromorphic_processing": request.neuromorphic_processing,
-                    "swarm_intelligence": request.swarm_intelligence
-                }
-            )
+        # آخر قراءة لاستهلاك النظام؛ تُحدَّث في الخلفية حتى لا تحجب نقطة المقاييس
+        self.cpu_usage = 0.0
+        self.memory_usage = 0.0
+        self.system_sample_interval = 2.0
+        # لقطات المقاييس تُحفظ في التاريخ بإيقاع ثابت من مهمة الخلفية لا مع كل طلب
+        self.metrics_snapshot_interval = 5.0
+        self._sampler_task: Optional[asyncio.Task] = None
+        
+    def start_system_sampler(self):
+        """تشغيل مهمة أخذ عينات المعالج والذاكرة في الخلفية (مرة واحدة)"""
+        if self._sampler_task is None or self._sampler_task.done():
+            try:
+                psutil.cpu_percent(interval=None)  # القراءة الأولى مرجعية فقط
+                self.memory_usage = psutil.virtual_memory().percent
+            except Exception:
+                pass
+            # أول لقطة عند البدء، فلا يبقى التاريخ فارغاً حتى أول دورة للمهمة
+            self.metrics_history.append(self._snapshot_metrics())
+            self._sampler_task = asyncio.create_task(self._sample_system())
+    
+    async def stop_system_sampler(self):
+        """إيقاف مهمة أخذ العينات"""
+        if self._sampler_task is not None:
+            self._sampler_task.cancel()
+            try:
+                await self._sampler_task
+            except asyncio.CancelledError:
+                pass
+            self._sampler_task = None
+    
+    async def _sample_system(self):
+        """أخذ عينات دورية دون حجب حلقة الأحداث، مع لقطة مقاييس كل metrics_snapshot_interval"""
+        last_snapshot = time.monotonic()
+        while True:
+            await asyncio.sleep(self.system_sample_interval)
+            try:
+                self.cpu_usage = psutil.cpu_percent(interval=None)
+                self.memory_usage = psutil.virtual_memory().percent
+            except Exception:
+                self.cpu_usage = 0.0
+                self.memory_usage = 0.0
             
+            now = time.monotonic()
+            if now - last_snapshot >= self.metrics_snapshot_interval:
+                self.metrics_history.append(self._snapshot_metrics())
+                last_snapshot = now
+        
+    async def create_job(self, request: AdvancedAnalysisRequest) -> str:
+        """إنشاء مهمة جديدة مع إدارة الأولوية"""
+        job_id = str(uuid.uuid4())
+        created_ts = time.time()
+        
+        job_result = AnalysisResult(
+            job_id=job_id,
+            status=JobStatus.PENDING,
+            component=request.component,
+            result={},
+            evidence=[],
+            confidence_score=0.0,
+            processing_time_ms=0.0,
+            created_at=datetime.fromtimestamp(created_ts),
+            metadata={
+                "priority": request.priority.value,
+                "iterations": request.max_iterations,
+                "revolutionary_mode": request.revolutionary_mode,
+                "quantum_analysis": request.quantum_analysis,
+                "neuromorphic_processing": request.neuromorphic_processing,
+                "swarm_intelligence": request.swarm_intelligence
+            }
+        )
+        
+        # إدارة الأولوية
+        priority_weight = PRIORITY_WEIGHTS.get(request.priority.value, 2)
+        
+        # القفل يحمي تعديلات الحالة المشتركة فقط ولا يُحتفظ به عبر أي await
+        async with self.lock:
             self.jobs[job_id] = job_result
             self.job_counts["pending"] += 1
-            
-            # إدارة الأولوية
-            priority_weights = {"low": 1, "normal": 2, "high": 3, "urgent": 4}
-            priority_weight = priority_weights.get(request.priority.value, 2)
             self.job_priorities[job_id] = priority_weight
+            self.job_created_ts[job_id] = created_ts
+            self.job_events[job_id] = asyncio.Event()
+            self.component_usage[request.component.value] += 1
+            self.priority_distribution[request.priority.value] += 1
             
             # إضافة لقائمة الانتظار حسب الأولوية
             self._add_to_queue_by_priority(job_id, priority_weight)
-            
-            logger.info(f"تم إنشاء مهمة جديدة: {job_id} - {request.component} (أولوية: {request.priority.value})")
-            return job_id
+        
+        logger.info(f"تم إنشاء مهمة جديدة: {job_id} - {request.component} (أولوية: {request.priority.value})")
+        return job_id
     
     def _add_to_queue_by_priority(self, job_id: str, priority_weight: int):
-        """إضافة المهمة لقائمة الانتظار حسب الأولوية"""
-        inserted = False
-        for i, queued_job_id in enumerate(self.job_queue):
-            if self.job_priorities.get(queued_job_id, 1) < priority_weight:
-                self.job_queue.insert(i, job_id)
-                inserted = True
-                break
-        
-        if not inserted:
-            self.job_queue.append(job_id)
+        """إضافة المهمة لقائمة الانتظار حسب الأولوية (الأقدم أولاً عند التساوي)"""
+        key = (-priority_weight, self._seq)
+        self._seq += 1
+        self._queued[job_id] = key
+        heapq.heappush(self._heap, (*key, job_id))
     
     def get_job(self, job_id: str) -> Optional[AnalysisResult]:
         """الحصول على معلومات المهمة"""
         return self.jobs.get(job_id)
     
+    async def wait_for_job(self, job_id: str, timeout: Optional[float] = None) -> Optional[AnalysisResult]:
+        """انتظار انتهاء المهمة (اكتمال/فشل/إلغاء) ثم إعادتها؛ عند انقضاء المهلة تُعاد حالتها الحالية"""
+        event = self.job_events.get(job_id)
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.jobs.get(job_id)
+    
     def get_all_jobs(self, status: Optional[JobStatus] = None, limit: int = 100) -> List[AnalysisResult]:
         """الحصول على جميع المهام"""
-        jobs = list(self.jobs.values())
+        jobs = (job for job in self.jobs.values() if not status or job.status == status)
         
-        if status:
-            jobs = [job for job in jobs if job.status == status]
-        
-        # ترتيب حسب الأولوية ثم التاريخ
-        jobs.sort(key=lambda x: (
-            -self.job_priorities.get(x.job_id, 1),
-            -x.created_at.timestamp()
+        # أعلى `limit` مهمة حسب الأولوية ثم التاريخ دون ترتيب كل المهام
+        return heapq.nlargest(limit, jobs, key=lambda x: (
+            self.job_priorities.get(x.job_id, 1),
+            self.job_created_ts.get(x.job_id, 0.0)
         ))
-        
-        return jobs[:limit]
     
     def get_queue_position(self, job_id: str) -> Optional[int]:
         """الحصول على موضع المهمة في قائمة الانتظار"""
-        try:
-            return self.job_queue.index(job_id) + 1
-        except ValueError:
+        key = self._queued.get(job_id)
+        if key is None:
             return None
+        return 1 + sum(1 for queued_key in self._queued.values() if queued_key < key)
     
-    def update_job_status(self, job_id: str, status: JobStatus, **kwargs):
+    async def update_job_status(self, job_id: str, status: JobStatus, **kwargs):
         """تحديث حالة المهمة"""
-        with self.lock:
-            if job_id in self.jobs:
-                old_status = self.jobs[job_id].status
+        async with self.lock:
+            job = self.jobs.get(job_id)
+            if job is not None:
+                old_status = job.status
+                self._track_confidence(job.confidence_score, -1)
                 
                 # تحديث الحالة
                 for key, value in kwargs.items():
-                    setattr(self.jobs[job_id], key, value)
-                self.jobs[job_id].status = status
+                    setattr(job, key, value)
+                job.status = status
+                self._track_confidence(job.confidence_score, 1)
                 
                 # تحديث الإحصائيات
                 if old_status in self.job_counts:
@@ -248,14 +365,46 @@ class AdvancedJobManager:
                 self.job_counts[status.value] += 1
                 
                 # إزالة من قائمة الانتظار إذا بدأت المعالجة
-                if status == JobStatus.PROCESSING and job_id in self.job_queue:
-                    self.job_queue.remove(job_id)
-                    self.job_start_times[job_id] = datetime.now()
+                if status == JobStatus.PROCESSING and job_id in self._queued:
+                    del self._queued[job_id]
+                    self.job_start_times[job_id] = time.monotonic()
                 
                 # إضافة لوقت الانتهاء
                 if status in [JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED]:
-                    if job_id in self.job_queue:
-                        self.job_queue.remove(job_id)
+                    self._queued.pop(job_id, None)
+                    if old_status not in (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED):
+                        self.job_events[job_id].set()
+                        self._finished_order.append(job_id)
+                        if len(self._finished_order) > self.max_finished_jobs:
+                            self._evict_job(self._finished_order.popleft())
+                
+                self._compact_queue()
+    
+    def _evict_job(self, job_id: str):
+        """حذف مهمة منتهية قديمة مع تحديث الإحصائيات"""
+        job = self.jobs.pop(job_id, None)
+        if job is None:
+            return
+        self.job_counts[job.status.value] = max(0, self.job_counts[job.status.value] - 1)
+        self.job_priorities.pop(job_id, None)
+        self.job_created_ts.pop(job_id, None)
+        self.job_start_times.pop(job_id, None)
+        self.job_events.pop(job_id, None)
+        self.component_usage[job.component.value] -= 1
+        self.priority_distribution[job.metadata.get("priority", "normal")] -= 1
+        self._track_confidence(job.confidence_score, -1)
+    
+    def _track_confidence(self, confidence_score: float, sign: int):
+        """إضافة (sign=1) أو إزالة (sign=-1) درجة ثقة من المجموع الجاري"""
+        if confidence_score > 0:
+            self.confidence_sum += sign * confidence_score
+            self.confidence_count += sign
+    
+    def _compact_queue(self):
+        """إعادة بناء الـ heap عندما تغلب عليه المدخلات الملغاة (الحذف الكسول)"""
+        if len(self._heap) > 2 * len(self._queued) + 64:
+            self._heap = [(*key, job_id) for job_id, key in self._queued.items()]
+            heapq.heapify(self._heap)
     
     def record_processing_time(self, job_id: str, processing_time_ms: float):
         """تسجيل وقت المعالجة"""
@@ -265,31 +414,47 @@ class AdvancedJobManager:
     
     def get_next_job_from_queue(self) -> Optional[str]:
         """الحصول على المهمة التالية من قائمة الانتظار"""
-        while self.job_queue and len(self.active_jobs) < self.max_concurrent_jobs:
-            job_id = self.job_queue[0]
-            if job_id in self.jobs and self.jobs[job_id].status == JobStatus.PENDING:
+        while self._heap and len(self.active_jobs) < self.max_concurrent_jobs:
+            job_id = self._heap[0][2]
+            if job_id in self._queued and job_id in self.jobs and self.jobs[job_id].status == JobStatus.PENDING:
                 return job_id
-            else:
-                self.job_queue.pop(0)
+            heapq.heappop(self._heap)
+            self._queued.pop(job_id, None)
         return None
     
     def get_performance_metrics(self) -> PerformanceMetrics:
-        """الحصول على مقاييس الأداء"""
+        """
+        الحصول على مقاييس الأداء: آخر لقطة تحفظها مهمة الخلفية، دون إنشاء نموذج مع كل طلب
+        
+        اللقطة قد تتأخر حتى metrics_snapshot_interval ثانية (5 افتراضياً) عن عدادات
+        المهام والطابور، واستهلاك النظام فيها من آخر عينة (كل system_sample_interval)؛
+        للعدادات اللحظية يُستخدم get_queue_status
+        """
+        # يبدأ أخذ العينات تلقائياً (مع أول لقطة) عند أول طلب داخل حلقة أحداث
         try:
-            cpu_usage = psutil.cpu_percent(interval=1)
-            memory_usage = psutil.virtual_memory().percent
-        except:
-            cpu_usage = 0.0
-            memory_usage = 0.0
+            asyncio.get_running_loop()
+            self.start_system_sampler()
+        except RuntimeError:
+            pass
+        if self._sampler_task is not None and not self._sampler_task.done():
+            return self.metrics_history[-1]
+        
+        # خارج حلقة الأحداث لا توجد مهمة خلفية: لقطة لحظية لا تُضاف إلى التاريخ
+        return self._snapshot_metrics()
+    
+    def _snapshot_metrics(self) -> PerformanceMetrics:
+        """بناء لقطة مقاييس من آخر عينة للنظام والعدادات الحالية"""
+        cpu_usage = self.cpu_usage
+        memory_usage = self.memory_usage
         
         avg_processing_time = (
             sum(self.processing_times) / len(self.processing_times) 
             if self.processing_times else 0.0
         )
         
-        uptime = (datetime.now() - self.start_time).total_seconds()
+        uptime = time.monotonic() - self._start_monotonic
         
-        metrics = PerformanceMetrics(
+        return PerformanceMetrics(
             cpu_usage=cpu_usage,
             memory_usage=memory_usage,
             active_jobs=len(self.active_jobs),
@@ -297,14 +462,10 @@ class AdvancedJobManager:
             failed_jobs=self.job_counts["failed"],
             pending_jobs=self.job_counts["pending"],
             average_processing_time=avg_processing_time,
-            queue_length=len(self.job_queue),
+            queue_length=len(self._queued),
             uptime_seconds=uptime,
             timestamp=datetime.now()
         )
-        
-        # حفظ في التاريخ
-        self.metrics_history.append(metrics)
-        return metrics
     
     def get_queue_status(self) -> Dict[str, Any]:
         """الحصول على حالة قائمة الانتظار"""
@@ -313,7 +474,7 @@ class AdvancedJobManager:
             "total_processing": self.job_counts["processing"],
             "total_completed": self.job_counts["completed"],
             "total_failed": self.job_counts["failed"],
-            "queue_length": len(self.job_queue),
+            "queue_length": len(self._queued),
             "active_jobs": len(self.active_jobs),
             "max_concurrent": self.max_concurrent_jobs
         }
@@ -323,26 +484,22 @@ class AdvancedJobManager:
         total_jobs = len(self.jobs)
         completed_jobs = self.job_counts["completed"]
         
-        # إحصائيات استخدام المكونات
-        component_usage = defaultdict(int)
-        priority_distribution = defaultdict(int)
-        
-        for job in self.jobs.values():
-            component_usage[job.component.value] += 1
-            priority_distribution[job.metadata.get("priority", "normal")] += 1
-        
-        # حساب متوسط الثقة
-        confidence_scores = [job.confidence_score for job in self.jobs.values() if job.confidence_score > 0]
-        avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0.0
+        # إحصائيات استخدام المكونات ومتوسط الثقة من العدادات الجارية
+        component_usage = +self.component_usage
+        priority_distribution = +self.priority_distribution
+        avg_confidence = self.confidence_sum / self.confidence_count if self.confidence_count else 0.0
         
         # إحصائيات أوقات المعالجة
         processing_stats = {}
         if self.processing_times:
+            # مصفوفة واحدة لكل الإحصائيات؛ الوسيط (العلوي) عبر partition دون ترتيب كامل
+            times = np.fromiter(self.processing_times, dtype=np.float64, count=len(self.processing_times))
+            mid = len(times) // 2
             processing_stats = {
-                "min": min(self.processing_times),
-                "max": max(self.processing_times),
-                "avg": sum(self.processing_times) / len(self.processing_times),
-                "median": sorted(self.processing_times)[len(self.processing_times) // 2]
+                "min": float(times.min()),
+                "max": float(times.max()),
+                "avg": float(times.mean()),
+                "median": float(np.partition(times, mid)[mid])
             }
         
         # إحصائيات يومية (محاكاة)
@@ -361,6 +518,65 @@ class AdvancedJobManager:
 # إنشاء مدير المهام المتقدم
 job_manager = AdvancedJobManager(max_concurrent_jobs=8)
 
+# تحليل المشاهد عمل حسابي بحت، فيُنفَّذ في عمليات منفصلة بدلاً من حلقة الأحداث
+ANALYSIS_WORKERS = os.cpu_count() or 1
+_analysis_executor: Optional[ProcessPoolExecutor] = None
+
+def get_analysis_executor() -> ProcessPoolExecutor:
+    """مجمع العمليات يُنشأ عند أول استخدام، ويُعاد إنشاؤه إن أُغلق سابقاً"""
+    global _analysis_executor
+    if _analysis_executor is None:
+        _analysis_executor = ProcessPoolExecutor(max_workers=ANALYSIS_WORKERS)
+    return _analysis_executor
+
+def shutdown_analysis_executor(wait: bool = True):
+    """إغلاق مجمع العمليات وإنهاء العمليات العاملة (يُستدعى عند إيقاف الخدمة)"""
+    global _analysis_executor
+    if _analysis_executor is not None:
+        _analysis_executor.shutdown(wait=wait, cancel_futures=True)
+        _analysis_executor = None
+
+atexit.register(shutdown_analysis_executor)
+
+def _analyze_scene_batch(
+    scenes: Tuple[Dict[str, Any], ...],
+    first_index: int,
+    iterations: int,
+    enable_context: bool,
+    context: Dict[str, Any],
+    quantum_analysis: bool,
+    revolutionary_mode: bool
+) -> List[List[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]]:
+    """نقطة دخول على مستوى الوحدة لعمليات الـ ProcessPool: تحليل دفعة مشاهد متتالية
+    لكل التكرارات، فيُنقل السياق مرة واحدة لكل دفعة لا لكل مشهد؛ النتائج مرتبة حسب التكرار"""
+    batch_results = []
+    for iteration in range(iterations):
+        iteration_results = []
+        for index, scene in enumerate(scenes, first_index):
+            # التحليل الأساسي
+            analysis = EnhancedSceneSalienceService._analyze_single_scene(
+                scene, index, iteration, enable_context, context
+            )
+            
+            # التحسين الكمومي إذا كان مفعلاً
+            quantum_enhancement = None
+            if quantum_analysis:
+                quantum_enhancement = EnhancedSceneSalienceService._apply_quantum_analysis(
+                    analysis, scene
+                )
+                analysis.update(quantum_enhancement)
+            
+            # التحسين الثوري إذا كان مفعلاً
+            if revolutionary_mode:
+                revolutionary_enhancement = EnhancedSceneSalienceService._apply_revolutionary_enhancement(
+                    analysis, scene, context
+                )
+                analysis.update(revolutionary_enhancement)
+            
+            iteration_results.append((analysis, quantum_enhancement))
+        batch_results.append(iteration_results)
+    return batch_results
+
 # ═══════════════════════════════════════════════════════════════════════════
 # خدمات المعالجة المتخصصة المحسنة
 # ═══════════════════════════════════════════════════════════════════════════
@@ -385,37 +601,33 @@ class EnhancedSceneSalienceService:
         results = []
         quantum_enhancements = []
         
+        # المشاهد لا تتغير بين التكرارات، فتُستخرج مرة واحدة (ومن الذاكرة المؤقتة للنص المكرر)
+        scenes = EnhancedSceneSalienceService._extract_scenes_cached(text)
+        
+        loop = asyncio.get_running_loop()
+        
+        # دفعة واحدة من المشاهد المتتالية لكل عامل تغطي كل التكرارات، بدلاً من مهمة
+        # لكل مشهد في كل تكرار ينقل كل منها السياق من جديد
+        batch_size = max(1, -(-len(scenes) // ANALYSIS_WORKERS))
+        batch_starts = range(0, len(scenes), batch_size)
+        logger.info(f"تحليل {len(scenes)} مشهد × {iterations} تكرار في {len(batch_starts)} دفعة")
+        executor = get_analysis_executor()
+        batches = await asyncio.gather(*(
+            loop.run_in_executor(
+                executor, _analyze_scene_batch,
+                scenes[start:start + batch_size], start, iterations,
+                enable_context, context, quantum_analysis, revolutionary_mode
+            )
+            for start in batch_starts
+        ))
+        
+        # إعادة الترتيب: التكرار أولاً ثم المشاهد بترتيبها، كما في التحليل التسلسلي
         for iteration in range(iterations):
-            logger.info(f"بدء تكرار {iteration + 1}/{iterations} لتحليل أهمية المشاهد")
-            
-            scenes = EnhancedSceneSalienceService._extract_scenes(text)
-            iteration_results = []
-            
-            for i, scene in enumerate(scenes):
-                # التحليل الأساسي
-                analysis = EnhancedSceneSalienceService._analyze_single_scene(
-                    scene, i, iteration, enable_context, context
-                )
-                
-                # التحسين الكمومي إذا كان مفعلاً
-                if quantum_analysis:
-                    quantum_enhancement = EnhancedSceneSalienceService._apply_quantum_analysis(
-                        analysis, scene
-                    )
-                    analysis.update(quantum_enhancement)
-                    quantum_enhancements.append(quantum_enhancement)
-                
-                # التحسين الثوري إذا كان مفعلاً
-                if revolutionary_mode:
-                    revolutionary_enhancement = EnhancedSceneSalienceService._apply_revolutionary_enhancement(
-                        analysis, scene, context
-                    )
-                    analysis.update(revolutionary_enhancement)
-                
-                iteration_results.append(analysis)
-            
-            results.extend(iteration_results)
-            await asyncio.sleep(0.05)  # تجنب الحمل الزائد
+            for batch in batches:
+                for analysis, quantum_enhancement in batch[iteration]:
+                    if quantum_enhancement is not None:
+                        quantum_enhancements.append(quantum_enhancement)
+                    results.append(analysis)
         
         # توليد الملخص الشامل
         summary = EnhancedSceneSalienceService._generate_comprehensive_summary(
@@ -437,38 +649,180 @@ class EnhancedSceneSalienceService:
             }
         }
     
+    @staticmethod
+    def _analyze_single_scene(scene: Dict[str, Any], index: int, iteration: int,
+                            enable_context: bool, context: Dict[str, Any]) -> Dict[str, Any]:
+        """تحليل أهمية مشهد واحد عبر أبعاد الشخصيات والحبكة والعاطفة والعناصر البصرية"""
+        start_time = time.perf_counter()
+        content = scene.get("content", "")
+        
+        # تحليل متعدد الأبعاد
+        breakdown = {
+            "character_development": EnhancedSceneSalienceService._analyze_character_development(scene),
+            "plot_advancement": EnhancedSceneSalienceService._analyze_plot_advancement(content),
+            "emotional_impact": EnhancedSceneSalienceService._analyze_emotional_impact(content),
+            "visual_complexity": EnhancedSceneSalienceService._analyze_visual_complexity(
+                scene.get("visual_elements", EMPTY_SCENE_ITEMS)
+            )
+        }
+        
+        # حساب النتيجة الإجمالية
+        total_score = sum(breakdown[key] * weight for key, weight in SCENE_SCORE_WEIGHTS.items())
+        
+        # تطبيق السياق
+        if enable_context and context:
+            total_score *= context.get("complexity_factor", 1.0)
+        total_score = min(1.0, total_score)
+        
+        recommendations = [
+            SCENE_RECOMMENDATIONS[key] for key, value in breakdown.items() if value < 0.3
+        ]
+        
+        return {
+            "scene_id": scene["id"],
+            "scene_index": index,
+            "iteration": iteration,
+            "importance_score": total_score,
+            "breakdown": breakdown,
+            "recommendations": recommendations,
+            "confidence_factors": {key: SCENE_SCORE_WEIGHTS[key] * value for key, value in breakdown.items()},
+            "processing_time_ms": (time.perf_counter() - start_time) * 1000
+        }
+    
+    @staticmethod
+    def _analyze_character_development(scene: Dict[str, Any]) -> float:
+        """كثافة الشخصيات في المشهد: خمس شخصيات أو أكثر تعطي الدرجة الكاملة"""
+        return min(1.0, len(scene.get("characters", EMPTY_SCENE_ITEMS)) / 5)
+    
+    @staticmethod
+    def _analyze_plot_advancement(content: str) -> float:
+        """تقدم الحبكة تقريبياً من طول المشهد بالكلمات (200 كلمة = الدرجة الكاملة)"""
+        return min(1.0, len(content.split()) / 200)
+    
+    @staticmethod
+    def _analyze_emotional_impact(content: str) -> float:
+        """الأثر العاطفي من عدد الكلمات العاطفية الدالة في نص المشهد"""
+        hits = sum(1 for word in content.lower().split() if word.strip('.,!?:;') in EMOTIONAL_WORDS)
+        return min(1.0, hits / 5)
+    
+    @staticmethod
+    def _analyze_visual_complexity(visual_elements) -> float:
+        """التعقيد البصري من عدد العناصر البصرية المستخرجة"""
+        return min(1.0, len(visual_elements) / 5)
+    
+    @staticmethod
+    def _apply_quantum_analysis(analysis: Dict[str, Any], scene: Dict[str, Any]) -> Dict[str, Any]:
+        """التحليل "الكمومي": مدى تماسك أبعاد المشهد (تباين منخفض = تماسك مرتفع)"""
+        values = np.fromiter(analysis["breakdown"].values(), dtype=np.float64)
+        uncertainty = float(values.std()) if values.size else 0.0
+        return {
+            "quantum_coherence": 1.0 - uncertainty,
+            "quantum_uncertainty": uncertainty
+        }
+    
+    @staticmethod
+    def _apply_revolutionary_enhancement(analysis: Dict[str, Any], scene: Dict[str, Any],
+                                         context: Dict[str, Any]) -> Dict[str, Any]:
+        """التحسين الثوري: إبراز البعد المهيمن على المشهد ورفع درجته بحسب نقاط الحبكة"""
+        breakdown = analysis["breakdown"]
+        dominant = max(breakdown, key=breakdown.get) if breakdown else None
+        boost = 1.0 + 0.1 * len(scene.get("plot_points", EMPTY_SCENE_ITEMS))
+        return {
+            "revolutionary_score": min(1.0, analysis["importance_score"] * boost),
+            "dominant_dimension": dominant
+        }
+    
+    @staticmethod
+    def _generate_comprehensive_summary(results: List[Dict[str, Any]], iterations: int,
+                                        quantum_enhancements: List[Dict[str, Any]],
+                                        revolutionary_mode: bool) -> Dict[str, Any]:
+        """ملخص التحليل: متوسط أهمية كل مشهد عبر التكرارات وأهم المشاهد"""
+        scene_scores: Dict[str, List[float]] = {}
+        for result in results:
+            scene_scores.setdefault(result["scene_id"], []).append(result["importance_score"])
+        average_scores = {scene_id: sum(scores) / len(scores) for scene_id, scores in scene_scores.items()}
+        
+        summary = {
+            "iterations": iterations,
+            "average_importance": (sum(average_scores.values()) / len(average_scores)) if average_scores else 0.0,
+            "top_scenes": heapq.nlargest(5, average_scores, key=average_scores.get),
+            "scene_scores": average_scores
+        }
+        if quantum_enhancements:
+            summary["average_quantum_coherence"] = (
+                sum(q["quantum_coherence"] for q in quantum_enhancements) / len(quantum_enhancements)
+            )
+        if revolutionary_mode:
+            summary["revolutionary_scores"] = [r.get("revolutionary_score", 0.0) for r in results]
+        return summary
+    
+    @staticmethod
+    def _calculate_confidence_distribution(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """توزيع درجات الأهمية على أرباع المدى [0, 1] مع المتوسط، بعمليات NumPy متجهة"""
+        scores = np.fromiter(
+            (r.get("importance_score", 0.0) for r in results), dtype=np.float64, count=len(results)
+        )
+        counts, _ = np.histogram(np.clip(scores, 0.0, 1.0), bins=CONFIDENCE_BINS)
+        distribution = {
+            f"{low:.2f}-{high:.2f}": int(count)
+            for low, high, count in zip(CONFIDENCE_BINS, CONFIDENCE_BINS[1:], counts)
+        }
+        distribution["mean"] = float(scores.mean()) if scores.size else 0.0
+        return distribution
+    
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _extract_scenes_cached(text: str) -> Tuple[Dict[str, Any], ...]:
+        """استخراج المشاهد مع ذاكرة مؤقتة للنصوص المكررة (النتيجة مشتركة فلا تُعدَّل)"""
+        return tuple(EnhancedSceneSalienceService._extract_scenes(text))
+    
     @staticmethod
     def _extract_scenes(text: str) -> List[Dict[str, Any]]:
         """استخراج المشاهد مع التحسينات"""
         scenes = []
-        lines = text.split('\n')
-        current_scene = None
-        scene_counter = 1
+        # حدود المشاهد من مسح واحد بالنمط المُجمَّع بدلاً من startswith لكل سطر
+        # سطر ختامي مضاف ليصبح لكل سطر فاصل، فتتطابق الأسطر المقروءة مع text.split('\n')
+        text += '\n'
+        starts = [match.start() for match in SCENE_HEADER_RE.finditer(text)]
+        starts.append(len(text))
         
-        for line in lines:
-            line = line.strip()
+        for scene_counter, (start, next_start) in enumerate(zip(starts, starts[1:]), 1):
+            header_end = text.find('\n', start, next_start)
             
-            # اكتشاف بداية مشهد جديد
-            if line.startswith(('INT.', 'EXT.', 'FADE IN:', 'CUT TO:', 'FADE OUT:')):
-                if current_scene:
-                    scenes.append(current_scene)
-                
-                current_scene = {
-                    "id": f"scene_{scene_counter}",
-                    "number": scene_counter,
-                    "header": line,
-                    "content": "",
-                    "characters": set(),
-                    "visual_elements": [],
-                    "emotional_markers": [],
-                    "plot_points": [],
-                    "technical_notes": []
-                }
-                scene_counter += 1
-                
-            elif current_scene:
-                current_scene["content"] += line + "\n"
+            # الأسطر تُجمع في قائمة وتُدمج مرة واحدة بدلاً من الإلحاق المتكرر بالنص
+            content_parts = []
+            # تُنشأ الحاويات عند أول عنصر فقط؛ المشاهد الخالية منها تتشارك صفاً فارغاً ثابتاً
+            characters = None
+            visual_elements = None
+            
+            # جسم المشهد: الأسطر بين سطر الرأس ورأس المشهد التالي، تُقرأ تدفقياً
+            # دون بناء قائمة بكل أسطر النص
+            for line in io.StringIO(text[header_end + 1:next_start]):
+                line = line.strip()
+                content_parts.append(line)
                 
                 # استخراج أسماء الشخصيات
                 if line.isupper() and len(line.split()) <= 3 and line not in ['INT.', 'EXT.']:
-                    current_scene
+                    if characters is None:
+                        characters = set()
+                    characters.add(line)
+                
+                # استخراج العناصر البصرية
+                if any(word in line.lower() for word in ['car', 'house', 'table', 'door', 'window']):
+                    if visual_elements is None:
+                        visual_elements = []
+                    visual_elements.append(line.strip())
+            
+            scenes.append({
+                "id": f"scene_{scene_counter}",
+                "number": scene_counter,
+                "header": text[start:header_end].strip(),
+                "content": "\n".join(content_parts) + "\n" if content_parts else "",
+                "characters": list(characters) if characters else EMPTY_SCENE_ITEMS,
+                "visual_elements": visual_elements or EMPTY_SCENE_ITEMS,
+                "emotional_markers": EMPTY_SCENE_ITEMS,
+                "plot_points": EMPTY_SCENE_ITEMS,
+                "technical_notes": EMPTY_SCENE_ITEMS
+            })
+        
+        return scenes
@@ -11,19 +11,26 @@ import asyncio
 import time
 import json
 import logging
+import numpy as np
 import psutil
-import requests
+import httpx
 import statistics
 import gc
 import sys
+import functools
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass, asdict
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor
 import multiprocessing as mp
-from threading import Lock
 import traceback
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # إعداد التسجيل
 logging.basicConfig(
     level=logging.INFO,
@@ -93,6 +100,58 @@ class AggregatedTestResults:
         if self.individual_results is None:
             self.individual_results = []
 
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+def encode_payload(payload: Dict[str, Any]) -> bytes:
+    """ترميز جسم الطلب إلى JSON (orjson إن توفر، وإلا json المدمجة بالشكل المضغوط نفسه)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def create_http_client(config: TestConfig) -> httpx.AsyncClient:
+    """عميل HTTP غير متزامن مشترك مع مجمع اتصالات دائم يتسع لكل المستخدمين المتزامنين"""
+    pool_size = config.concurrent_users * 2
+    return httpx.AsyncClient(
+        base_url=config.base_url,
+        timeout=config.max_response_time,
+        limits=httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=60
+        )
+    )
+
+def with_http_client(method):
+    """
+    يضمن وجود عميل HTTP للمختبِر أثناء الاختبار: العميل المشترك الذي تمرره المجموعة
+    الشاملة يُستخدم كما هو، وعند التشغيل المستقل يُنشأ عميل خاص ويُغلق بعد الاختبار
+    """
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        if self.client is not None:
+            return await method(self, *args, **kwargs)
+        async with create_http_client(self.config) as client:
+            self.client = client
+            try:
+                return await method(self, *args, **kwargs)
+            finally:
+                self.client = None
+    return wrapper
+
+def _summarize(values) -> Tuple[float, float, float, float, float]:
+    """(الأدنى، الأقصى، المتوسط، p95، p99) من ترتيب واحد للقيم"""
+    ordered = sorted(values)
+    n = len(ordered)
+    if not n:
+        return 0, 0, 0, 0, 0
+    return (
+        ordered[0],
+        ordered[-1],
+        sum(ordered) / n,
+        ordered[int(0.95 * (n - 1))],
+        ordered[int(0.99 * (n - 1))]
+    )
+
 # ═══════════════════════════════════════════════════════════════════════════
 # نظام مراقبة الموارد المتقدم
 # ═══════════════════════════════════════════════════════════════════════════
@@ -100,35 +159,43 @@ class AggregatedTestResults:
 class AdvancedResourceMonitor:
     """نظام مراقبة متقدم للموارد"""
     
-    def __init__(self, sampling_interval: float = 0.5):
+    def __init__(self, sampling_interval: float = 0.5, capacity: int = 100000):
         self.sampling_interval = sampling_interval
         self.monitoring = False
-        self.data = {
-            'cpu_samples': [],
-            'memory_samples': [],
-            'timestamps': []
-        }
-        self.lock = Lock()
+        # مخازن حلقية مخصصة مسبقاً؛ خيط المراقبة هو الكاتب الوحيد، فيكتب العينة
+        # ثم يزيد العداد، والقارئ يأخذ لقطة من العداد دون قفل
+        self.capacity = capacity
+        self._cpu = np.empty(capacity, dtype=np.float32)
+        self._memory = np.empty(capacity, dtype=np.float32)
+        self._timestamps = np.empty(capacity, dtype=np.float64)  # time.monotonic()
+        self._count = 0
         self.monitor_thread = None
+        # عملية منفصلة عن خيط المراقبة لأخذ عينة فورية غير حاجبة عند حافة نافذة فارغة
+        self._edge_process = psutil.Process()
     
     def start_monitoring(self):
-        """بدء المراقبة"""
+        """بدء المراقبة (لا تأثير لها إن كانت المراقبة جارية، فلا تضيع العينات السابقة)"""
+        if self.monitoring:
+            return
         self.monitoring = True
-        self.data = {'cpu_samples': [], 'memory_samples': [], 'timestamps': []}
+        self._count = 0
+        self._edge_process.cpu_percent(interval=None)  # مرجع العينة الفورية
         
         def monitor_loop():
             process = psutil.Process()
+            # القراءة الأولى مرجعية فقط؛ بعدها تقيس كل قراءة غير حاجبة الفترة منذ سابقتها
+            process.cpu_percent(interval=None)
             while self.monitoring:
                 try:
-                    cpu_percent = process.cpu_percent(interval=0.1)
+                    time.sleep(self.sampling_interval)
+                    cpu_percent = process.cpu_percent(interval=0.0)
                     memory_mb = process.memory_info().rss / (1024 * 1024)
                     
-                    with self.lock:
-                        self.data['cpu_samples'].append(cpu_percent)
-                        self.data['memory_samples'].append(memory_mb)
-                        self.data['timestamps'].append(datetime.now().isoformat())
-                    
-                    time.sleep(self.sampling_interval)
+                    slot = self._count % self.capacity
+                    self._cpu[slot] = cpu_percent
+                    self._memory[slot] = memory_mb
+                    self._timestamps[slot] = time.monotonic()
+                    self._count += 1
                 except Exception as e:
                     logger.error(f"خطأ في المراقبة: {e}")
         
@@ -144,22 +211,54 @@ class AdvancedResourceMonitor:
     
     def get_statistics(self) -> Dict[str, Any]:
         """الحصول على إحصائيات الموارد"""
-        with self.lock:
-            if not self.data['cpu_samples']:
-                return {
-                    'cpu_avg': 0, 'cpu_peak': 0,
-                    'memory_avg': 0, 'memory_peak': 0
-                }
-            
+        filled = min(self._count, self.capacity)
+        return self._summarize_samples(self._cpu[:filled], self._memory[:filled])
+    
+    def snapshot(self, t0: float, t1: float) -> Dict[str, Any]:
+        """إحصائيات العينات المأخوذة بين t0 و t1 (بتوقيت time.monotonic())"""
+        filled = min(self._count, self.capacity)
+        timestamps = self._timestamps[:filled]
+        in_window = (timestamps >= t0) & (timestamps <= t1)
+        if in_window.any():
+            return self._summarize_samples(self._cpu[:filled][in_window], self._memory[:filled][in_window])
+        
+        # نافذة أقصر من sampling_interval لا تحوي عينات: أحدث عينة حتى t1 إن كانت
+        # حديثة بما يكفي، وإلا عينة فورية غير حاجبة
+        before = np.flatnonzero(timestamps <= t1)
+        if before.size:
+            newest = before[np.argmax(timestamps[before])]
+            if t0 - timestamps[newest] <= self.sampling_interval:
+                return self._summarize_samples(self._cpu[newest:newest + 1], self._memory[newest:newest + 1])
+        return self._summarize_samples(*self._sample_now())
+    
+    def _sample_now(self) -> Tuple[np.ndarray, np.ndarray]:
+        """عينة واحدة فورية: المعالج منذ القراءة الفورية السابقة والذاكرة الحالية"""
+        try:
+            cpu_percent = self._edge_process.cpu_percent(interval=None)
+            memory_mb = self._edge_process.memory_info().rss / (1024 * 1024)
+        except Exception as e:
+            logger.error(f"خطأ في المراقبة: {e}")
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.float32)
+        return np.array([cpu_percent], dtype=np.float32), np.array([memory_mb], dtype=np.float32)
+    
+    @staticmethod
+    def _summarize_samples(cpu: np.ndarray, memory: np.ndarray) -> Dict[str, Any]:
+        """متوسط/ذروة/أدنى المعالج والذاكرة لمجموعة عينات"""
+        if not cpu.size:
             return {
-                'cpu_avg': statistics.mean(self.data['cpu_samples']),
-                'cpu_peak': max(self.data['cpu_samples']),
-                'cpu_min': min(self.data['cpu_samples']),
-                'memory_avg': statistics.mean(self.data['memory_samples']),
-                'memory_peak': max(self.data['memory_samples']),
-                'memory_min': min(self.data['memory_samples']),
-                'sample_count': len(self.data['cpu_samples'])
+                'cpu_avg': 0, 'cpu_peak': 0,
+                'memory_avg': 0, 'memory_peak': 0
             }
+        
+        return {
+            'cpu_avg': float(cpu.mean()),
+            'cpu_peak': float(cpu.max()),
+            'cpu_min': float(cpu.min()),
+            'memory_avg': float(memory.mean()),
+            'memory_peak': float(memory.max()),
+            'memory_min': float(memory.min()),
+            'sample_count': int(cpu.size)
+        }
 
 # ═══════════════════════════════════════════════════════════════════════════
 # اختبار الأداء مع النصوص الطويلة
@@ -168,13 +267,7 @@ class AdvancedResourceMonitor:
 class LongTextPerformanceTester:
     """اختبار الأداء مع النصوص الطويلة"""
     
-    def __init__(self, config: TestConfig):
-        self.config = config
-        self.monitor = AdvancedResourceMonitor()
-    
-    def generate_text(self, size: int) -> str:
-        """توليد نص بالحجم المطلوب"""
-        scene_template = """
+    SCENE_TEMPLATE = """
 INT. MODERN OFFICE - DAY
 
 A bustling workspace filled with activity. EMPLOYEES work diligently at their desks.
@@ -188,19 +281,44 @@ We have an important deadline approaching. Let's stay focused and deliver excell
 
 The camera pans across various workstations, capturing the dedication of each team member.
 """
-        repetitions = (size // len(scene_template)) + 1
-        return (scene_template * repetitions)[:size]
     
+    def __init__(
+        self,
+        config: TestConfig,
+        client: Optional[httpx.AsyncClient] = None,
+        monitor: Optional[AdvancedResourceMonitor] = None
+    ):
+        self.config = config
+        self.client = client
+        # مراقب مشترك تمرره المجموعة الشاملة؛ كل اختبار يقرأ نافذته الزمنية منه
+        self.monitor = monitor or AdvancedResourceMonitor()
+        # المراقب الخاص (عند التشغيل المستقل) يُوقَف بعد كل اختبار؛ المشترك يوقفه مالكه
+        self._owns_monitor = monitor is None
+        # النص يُبنى مرة واحدة بأكبر حجم مطلوب؛ كل حجم أصغر بادئة منه
+        self._full_text = self._repeat_template(max(config.text_sizes, default=0))
+    
+    def _repeat_template(self, size: int) -> str:
+        """تكرار قالب المشهد حتى يغطي الحجم المطلوب"""
+        return self.SCENE_TEMPLATE * ((size // len(self.SCENE_TEMPLATE)) + 1)
+    
+    def generate_text(self, size: int) -> str:
+        """توليد نص بالحجم المطلوب"""
+        if size > len(self._full_text):
+            self._full_text = self._repeat_template(size)
+        return self._full_text[:size]
+    
+    @with_http_client
     async def test_text_size(self, text_size: int) -> TestResult:
         """اختبار حجم نص معين"""
         logger.info(f"اختبار حجم النص: {text_size:,} حرف")
         
-        # توليد النص
+        # تنظيف الذاكرة قبل توليد النص حتى لا تقع أي منهما داخل نافذة القياس
+        gc.collect()
         test_text = self.generate_text(text_size)
         
-        # بدء المراقبة
+        # بدء نافذة القياس
         self.monitor.start_monitoring()
-        gc.collect()
+        window_start = time.monotonic()
         
         start_time = time.time()
         success = False
@@ -217,11 +335,7 @@ The camera pans across various workstations, capturing the dedication of each te
                 "chunk_size": 100
             }
             
-            response = requests.post(
-                f"{self.config.base_url}/analyze",
-                json=payload,
-                timeout=self.config.max_response_time
-            )
+            response = await self.client.post("/analyze", content=encode_payload(payload), headers=JSON_HEADERS)
             
             success = response.status_code == 200
             
@@ -231,9 +345,10 @@ The camera pans across various workstations, capturing the dedication of each te
         
         response_time = time.time() - start_time
         
-        # إيقاف المراقبة
-        self.monitor.stop_monitoring()
-        stats = self.monitor.get_statistics()
+        # إحصائيات نافذة هذا الاختبار فقط
+        stats = self.monitor.snapshot(window_start, time.monotonic())
+        if self._owns_monitor:
+            self.monitor.stop_monitoring()
         
         return TestResult(
             test_name=f"long_text_{text_size}",
@@ -244,6 +359,7 @@ The camera pans across various workstations, capturing the dedication of each te
             error_message=error_msg
         )
     
+    @with_http_client
     async def run_all_tests(self) -> AggregatedTestResults:
         """تشغيل جميع اختبارات النصوص الطويلة"""
         logger.info("بدء اختبارات النصوص الطويلة")
@@ -258,24 +374,29 @@ The camera pans across various workstations, capturing the dedication of each te
     
     def _aggregate_results(self, suite_name: str, results: List[TestResult]) -> AggregatedTestResults:
         """تجميع النتائج"""
-        successful = [r for r in results if r.success]
-        response_times = [r.response_time for r in results]
+        # مرور واحد على النتائج لبناء كل السلاسل، ثم ترتيب واحد لأزمنة الاستجابة
+        response_times, memory, cpu, success_flags = (
+            zip(*((r.response_time, r.memory_usage_mb, r.cpu_usage_percent, r.success) for r in results))
+            if results else ((), (), (), ())
+        )
+        min_rt, max_rt, avg_rt, p95_rt, p99_rt = _summarize(response_times)
+        successful = sum(success_flags)
         
         return AggregatedTestResults(
             test_suite_name=suite_name,
             total_tests=len(results),
-            successful_tests=len(successful),
-            failed_tests=len(results) - len(successful),
-            average_response_time=statistics.mean(response_times) if response_times else 0,
-            min_response_time=min(response_times) if response_times else 0,
-            max_response_time=max(response_times) if response_times else 0,
-            p95_response_time=statistics.quantiles(response_times, n=20)[18] if len(response_times) > 20 else max(response_times) if response_times else 0,
-            p99_response_time=statistics.quantiles(response_times, n=100)[98] if len(response_times) > 100 else max(response_times) if response_times else 0,
-            average_memory_mb=statistics.mean([r.memory_usage_mb for r in results]),
-            peak_memory_mb=max([r.memory_usage_mb for r in results]),
-            average_cpu_percent=statistics.mean([r.cpu_usage_percent for r in results]),
-            peak_cpu_percent=max([r.cpu_usage_percent for r in results]),
-            success_rate=len(successful) / len(results) if results else 0,
+            successful_tests=successful,
+            failed_tests=len(results) - successful,
+            average_response_time=avg_rt,
+            min_response_time=min_rt,
+            max_response_time=max_rt,
+            p95_response_time=p95_rt,
+            p99_response_time=p99_rt,
+            average_memory_mb=sum(memory) / len(results) if results else 0,
+            peak_memory_mb=max(memory, default=0),
+            average_cpu_percent=sum(cpu) / len(results) if results else 0,
+            peak_cpu_percent=max(cpu, default=0),
+            success_rate=successful / len(results) if results else 0,
             individual_results=results
         )
 
@@ -286,12 +407,23 @@ The camera pans across various workstations, capturing the dedication of each te
 class ConcurrentLoadTester:
     """اختبار التحميل مع طلبات متعددة متزامنة"""
     
-    def __init__(self, config: TestConfig):
+    def __init__(
+        self,
+        config: TestConfig,
+        client: Optional[httpx.AsyncClient] = None,
+        monitor: Optional[AdvancedResourceMonitor] = None
+    ):
         self.config = config
-        self.monitor = AdvancedResourceMonitor()
+        self.client = client
+        # مراقب مشترك تمرره المجموعة الشاملة؛ كل اختبار يقرأ نافذته الزمنية منه
+        self.monitor = monitor or AdvancedResourceMonitor()
+        # المراقب الخاص (عند التشغيل المستقل) يُوقَف بعد كل اختبار؛ المشترك يوقفه مالكه
+        self._owns_monitor = monitor is None
+        self.response_times = np.zeros(0, dtype=np.float64)
+        self.success_flags = np.zeros(0, dtype=np.bool_)
     
-    def make_request(self, request_id: int) -> TestResult:
-        """إرسال طلب واحد"""
+    async def make_request(self, request_id: int) -> Optional[TestResult]:
+        """إرسال طلب واحد؛ الزمن والنجاح يُكتبان في مصفوفات الاختبار، ويُعاد TestResult للفشل فقط"""
         start_time = time.time()
         success = False
         error_msg = None
@@ -304,11 +436,7 @@ class ConcurrentLoadTester:
                 "confidence_threshold": 0.7
             }
             
-            response = requests.post(
-                f"{self.config.base_url}/analyze",
-                json=payload,
-                timeout=self.config.max_response_time
-            )
+            response = await self.client.post("/analyze", content=encode_payload(payload), headers=JSON_HEADERS)
             
             success = response.status_code == 200
             
@@ -316,7 +444,11 @@ class ConcurrentLoadTester:
             error_msg = str(e)
         
         response_time = time.time() - start_time
+        self.response_times[request_id] = response_time
+        self.success_flags[request_id] = success
         
+        if success:
+            return None
         return TestResult(
             test_name=f"concurrent_request_{request_id}",
             success=success,
@@ -326,59 +458,89 @@ class ConcurrentLoadTester:
             error_message=error_msg
         )
     
+    @with_http_client
     async def run_concurrent_test(self) -> AggregatedTestResults:
         """تشغيل اختبار الطلبات المتزامنة"""
         logger.info(f"بدء اختبار التحميل: {self.config.total_requests} طلب، {self.config.concurrent_users} متزامن")
         
-        # بدء المراقبة
+        # نتائج الطلبات كمصفوفات (بنية المصفوفات) بدلاً من كائن لكل طلب
+        self.response_times = np.zeros(self.config.total_requests, dtype=np.float64)
+        self.success_flags = np.zeros(self.config.total_requests, dtype=np.bool_)
+        
+        # بدء نافذة القياس
         self.monitor.start_monitoring()
+        window_start = time.monotonic()
         
-        results = []
-        with ThreadPoolExecutor(max_workers=self.config.concurrent_users) as executor:
-            futures = [
-                executor.submit(self.make_request, i)
-                for i in range(self.config.total_requests)
-            ]
-            
-            for future in as_completed(futures):
-                try:
-                    result = future.result()
-                    results.append(result)
-                except Exception as e:
-                    logger.error(f"خطأ في الطلب: {e}")
+        # الطلبات تتداخل على حلقة الأحداث؛ الإشارة تحد عدد الطلبات الجارية بعدد المستخدمين
+        semaphore = asyncio.Semaphore(self.config.concurrent_users)
+        
+        async def guarded_request(request_id: int) -> Optional[TestResult]:
+            async with semaphore:
+                return await self.make_request(request_id)
         
-        # إيقاف المراقبة
-        self.monitor.stop_monitoring()
-        stats = self.monitor.get_statistics()
+        outcomes = await asyncio.gather(
+            *(guarded_request(i) for i in range(self.config.total_requests)),
+            return_exceptions=True
+        )
+        
+        failures = []
+        for request_id, outcome in enumerate(outcomes):
+            if isinstance(outcome, BaseException):
+                # استثناء أفلت من make_request يُسجَّل كطلب فاشل بدلاً من إسقاط الاختبار كله
+                logger.error(f"خطأ في الطلب {request_id}: {outcome!r}")
+                self.success_flags[request_id] = False
+                outcome = TestResult(
+                    test_name=f"concurrent_request_{request_id}",
+                    success=False,
+                    response_time=float(self.response_times[request_id]),
+                    memory_usage_mb=0,
+                    cpu_usage_percent=0,
+                    error_message=repr(outcome)
+                )
+            if outcome is not None:
+                failures.append(outcome)
+        
+        # إحصائيات نافذة هذا الاختبار فقط
+        stats = self.monitor.snapshot(window_start, time.monotonic())
+        if self._owns_monitor:
+            self.monitor.stop_monitoring()
         
         # تحديث نتائج الموارد
-        for result in results:
+        for result in failures:
             result.memory_usage_mb = stats['memory_avg']
             result.cpu_usage_percent = stats['cpu_avg']
         
-        return self._aggregate_results("concurrent_load_test", results)
+        return self._aggregate_results("concurrent_load_test", stats, failures)
     
-    def _aggregate_results(self, suite_name: str, results: List[TestResult]) -> AggregatedTestResults:
-        """تجميع النتائج"""
-        successful = [r for r in results if r.success]
-        response_times = [r.response_time for r in results]
+    def _aggregate_results(self, suite_name: str, stats: Dict[str, Any], failures: List[TestResult]) -> AggregatedTestResults:
+        """تجميع النتائج من المصفوفات؛ individual_results تحمل الطلبات الفاشلة فقط"""
+        total = len(self.response_times)
+        successful = int(np.count_nonzero(self.success_flags))
+        if total:
+            p95_rt, p99_rt = np.percentile(self.response_times, [95, 99], method='lower')
+        else:
+            p95_rt = p99_rt = 0
+        
+        # كل الطلبات تشترك في متوسط المراقب نفسه، فالمتوسط والذروة لكل طلب متساويان
+        memory_mb = stats['memory_avg'] if total else 0
+        cpu_percent = stats['cpu_avg'] if total else 0
         
         return AggregatedTestResults(
             test_suite_name=suite_name,
-            total_tests=len(results),
-            successful_tests=len(successful),
-            failed_tests=len(results) - len(successful),
-            average_response_time=statistics.mean(response_times) if response_times else 0,
-            min_response_time=min(response_times) if response_times else 0,
-            max_response_time=max(response_times) if response_times else 0,
-            p95_response_time=statistics.quantiles(response_times, n=20)[18] if len(response_times) > 20 else max(response_times) if response_times else 0,
-            p99_response_time=statistics.quantiles(response_times, n=100)[98] if len(response_times) > 100 else max(response_times) if response_times else 0,
-            average_memory_mb=statistics.mean([r.memory_usage_mb for r in results]),
-            peak_memory_mb=max([r.memory_usage_mb for r in results]),
-            average_cpu_percent=statistics.mean([r.cpu_usage_percent for r in results]),
-            peak_cpu_percent=max([r.cpu_usage_percent for r in results]),
-            success_rate=len(successful) / len(results) if results else 0,
-            individual_results=results
+            total_tests=total,
+            successful_tests=successful,
+            failed_tests=total - successful,
+            average_response_time=float(self.response_times.mean()) if total else 0,
+            min_response_time=float(self.response_times.min()) if total else 0,
+            max_response_time=float(self.response_times.max()) if total else 0,
+            p95_response_time=float(p95_rt),
+            p99_response_time=float(p99_rt),
+            average_memory_mb=memory_mb,
+            peak_memory_mb=memory_mb,
+            average_cpu_percent=cpu_percent,
+            peak_cpu_percent=cpu_percent,
+            success_rate=successful / total if total else 0,
+            individual_results=failures
         )
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -388,10 +550,20 @@ class ConcurrentLoadTester:
 class MemoryResourceTester:
     """اختبار استهلاك الذاكرة والموارد"""
     
-    def __init__(self, config: TestConfig):
+    def __init__(
+        self,
+        config: TestConfig,
+        client: Optional[httpx.AsyncClient] = None,
+        monitor: Optional[AdvancedResourceMonitor] = None
+    ):
         self.config = config
-        self.monitor = AdvancedResourceMonitor()
+        self.client = client
+        # مراقب مشترك تمرره المجموعة الشاملة؛ كل اختبار يقرأ نافذته الزمنية منه
+        self.monitor = monitor or AdvancedResourceMonitor()
+        # المراقب الخاص (عند التشغيل المستقل) يُوقَف بعد كل اختبار؛ المشترك يوقفه مالكه
+        self._owns_monitor = monitor is None
     
+    @with_http_client
     async def test_memory_leak(self, iterations: int = 10) -> Dict[str, Any]:
         """اختبار تسرب الذاكرة"""
         logger.info(f"بدء اختبار تسرب الذاكرة: {iterations} تكرار")
@@ -409,10 +581,8 @@ class MemoryResourceTester:
                     "component": "scene_salience"
                 }
                 
-                response = requests.post(
-                    f"{self.config.base_url}/analyze",
-                    json=payload,
-                    timeout=30
+                response = await self.client.post(
+                    "/analyze", content=encode_payload(payload), headers=JSON_HEADERS, timeout=30
                 )
             except Exception as e:
                 logger.error(f"خطأ في التكرار {i}: {e}")
@@ -442,11 +612,13 @@ class MemoryResourceTester:
             'potential_leak': sum(deltas) > 100  # أكثر من 100MB زيادة
         }
     
+    @with_http_client
     async def test_resource_limits(self) -> Dict[str, Any]:
         """اختبار حدود الموارد"""
         logger.info("بدء اختبار حدود الموارد")
         
         self.monitor.start_monitoring()
+        window_start = time.monotonic()
         
         # إرسال طلبات متعددة لاختبار الحدود
         results = []
@@ -459,10 +631,8 @@ class MemoryResourceTester:
                 }
                 
                 start_time = time.time()
-                response = requests.post(
-                    f"{self.config.base_url}/analyze",
-                    json=payload,
-                    timeout=30
+                response = await self.client.post(
+                    "/analyze", content=encode_payload(payload), headers=JSON_HEADERS, timeout=30
                 )
                 response_time = time.time() - start_time
                 
@@ -481,8 +651,9 @@ class MemoryResourceTester:
             
             await asyncio.sleep(0.5)
         
-        self.monitor.stop_monitoring()
-        stats = self.monitor.get_statistics()
+        stats = self.monitor.snapshot(window_start, time.monotonic())
+        if self._owns_monitor:
+            self.monitor.stop_monitoring()
         
         return {
             'test_name': 'resource_limits_test',
@@ -502,9 +673,11 @@ class ComprehensiveTestSuite:
     
     def __init__(self, config: TestConfig = None):
         self.config = config or TestConfig()
-        self.long_text_tester = LongTextPerformanceTester(self.config)
-        self.concurrent_tester = ConcurrentLoadTester(self.config)
-        self.memory_tester = MemoryResourceTester(self.config)
+        # مراقب واحد طويل العمر لكل الاختبارات بدلاً من تشغيل خيط جديد لكل اختبار
+        self.monitor = AdvancedResourceMonitor()
+        self.long_text_tester = LongTextPerformanceTester(self.config, monitor=self.monitor)
+        self.concurrent_tester = ConcurrentLoadTester(self.config, monitor=self.monitor)
+        self.memory_tester = MemoryResourceTester(self.config, monitor=self.monitor)
         self.all_results = {}
     
     async def run_all_tests(self) -> Dict[str, Any]:
@@ -513,6 +686,28 @@ class ComprehensiveTestSuite:
         logger.info("بدء مجموعة الاختبارات الشاملة")
         logger.info("=" * 80)
         
+        # عميل HTTP واحد بمجمع اتصالات مشترك لكل المختبرين طوال التشغيل
+        self.monitor.start_monitoring()
+        try:
+            async with create_http_client(self.config) as client:
+                self.long_text_tester.client = client
+                self.concurrent_tester.client = client
+                self.memory_tester.client = client
+                await self._run_test_suites()
+        finally:
+            self.monitor.stop_monitoring()
+        
+        # إنشاء ملخص شامل
+        self.all_results['summary'] = self._create_summary()
+        
+        logger.info("\n" + "=" * 80)
+        logger.info("انتهت جميع الاختبارات")
+        logger.info("=" * 80)
+        
+        return self.all_results
+    
+    async def _run_test_suites(self):
+        """تشغيل مجموعات الاختبار بالترتيب"""
         # 1. اختبارات النصوص الطويلة
         logger.info("\n1️⃣ اختبارات النصوص الطويلة")
         long_text_results = await self.long_text_tester.run_all_tests()
@@ -532,15 +727,6 @@ class ComprehensiveTestSuite:
             'memory_leak': memory_leak_results,
             'resource_limits': resource_limit_results
         }
-        
-        # إنشاء ملخص شامل
-        self.all_results['summary'] = self._create_summary()
-        
-        logger.info("\n" + "=" * 80)
-        logger.info("انتهت جميع الاختبارات")
-        logger.info("=" * 80)
-        
-        return self.all_results
     
     def _create_summary(self) -> Dict[str, Any]:
         """إنشاء ملخص شامل للنتائج"""
@@ -586,8 +772,15 @@ class ComprehensiveTestSuite:
     
     def save_results(self, filename: str = "performance_test_results.json"):
         """حفظ النتائج في ملف"""
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.all_results, f, ensure_ascii=False, indent=2)
+        if ORJSON_AVAILABLE:
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(
+                    self.all_results,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+                ))
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(self.all_results, f, ensure_ascii=False, indent=2)
         
         logger.info(f"تم حفظ النتائج في: {filename}")
     
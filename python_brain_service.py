@@ -12,18 +12,32 @@ Python Brain Service for Three-Read Breakdown System
 """
 
 import asyncio
+import hashlib
+import heapq
+import io
+import os
+import re
 import uuid
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Union, Literal
 from enum import Enum
 from dataclasses import dataclass, asdict
 import json
 import traceback
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from collections import Counter, OrderedDict
+from itertools import islice
+from operator import attrgetter
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+import numpy as np
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 import uvicorn
 
 # استيراد الأنظمة الموجودة
@@ -40,14 +54,35 @@ except ImportError:
 try:
     from ultimate_breakdown_system import (
         RevolutionarySceneParser,
-        DetailedBreakdown,
-        split_scenes
+        DetailedBreakdown
     )
     ULTIMATE_AVAILABLE = True
 except ImportError:
     ULTIMATE_AVAILABLE = False
     logging.warning("Ultimate Breakdown System غير متاح")
 
+# orjson اختياري لتسلسل الاستجابات بسرعة أعلى
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Aho-Corasick اختياري لمسح الكلمات المفتاحية في مرور واحد
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Numba اختياري لتسريع مسح عناوين المشاهد
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 # ═══════════════════════════════════════════════════════════════════════════
 # إعداد التسجيل
 # ═══════════════════════════════════════════════════════════════════════════
@@ -58,6 +93,243 @@ logging.basicConfig(
 )
 logger = logging.getLogger("PythonBrainService")
 
+# ═══════════════════════════════════════════════════════════════════════════
+# ثوابت تحليل أهمية المشاهد (Scene Salience)
+# ═══════════════════════════════════════════════════════════════════════════
+
+# تُترجم فئات الكلمات المفتاحية في نمط واحد بمجموعات مسماة، فيُمسح نص كل
+# مشهد (بعد تصغيره) مرة واحدة ويُعدّ كل تطابق حسب فئته
+SALIENCE_KEYWORDS_RE = re.compile(
+    r"(?P<plot>صراع|مواجهة|يكتشف|تكتشف|كشف|مفاجأة|اعتراف|قرار|خيانة|"
+    r"conflict|resolution|twist|revelation|confront|decision)"
+    r"|(?P<emotion>يبكي|تبكي|يصرخ|تصرخ|غضب|خوف|حزن|فرح|حب|دموع|"
+    r"cries|screams|anger|fear|sad|joy|love|tears)"
+    r"|(?P<visual>انفجار|مطاردة|حريق|نار|مطر|عاصفة|ظلام|ضوء|سيارة|"
+    r"explosion|chase|fire|rain|storm|dark|light|car)"
+)
+# سطر حوار: اسم شخصية قصير يليه نقطتان
+DIALOGUE_RE = re.compile(r"^\s*([^\s:]+(?:\s[^\s:]+)?)\s*:", re.M)
+
+PROP_KEYWORDS = (
+    'ظرف', 'هاتف', 'موبايل', 'لابتوب', 'حاسب', 'مجلة',
+    'حقيبة', 'كأس', 'كوب', 'مفتاح', 'نظارة', 'ساعة'
+)
+
+# مطابِق واحد لكل الكلمات بدلاً من مسح النص مرة لكل كلمة
+if AHOCORASICK_AVAILABLE:
+    PROP_MATCHER = ahocorasick.Automaton()
+    for _keyword in PROP_KEYWORDS:
+        PROP_MATCHER.add_word(_keyword, _keyword)
+    PROP_MATCHER.make_automaton()
+else:
+    PROP_MATCHER = re.compile("|".join(map(re.escape, PROP_KEYWORDS)))
+
+
+def find_prop_keywords(text_lower: str) -> List[str]:
+    """الكلمات المفتاحية للدعائم الموجودة في النص، بترتيب PROP_KEYWORDS"""
+    if AHOCORASICK_AVAILABLE:
+        hits = {keyword for _, keyword in PROP_MATCHER.iter(text_lower)}
+    else:
+        hits = set(PROP_MATCHER.findall(text_lower))
+    return [keyword for keyword in PROP_KEYWORDS if keyword in hits]
+
+SALIENCE_CACHE_SIZE = 512  # عدد نتائج أهمية المشاهد المحفوظة حسب بصمة النص
+BREAKDOWN_CACHE_SIZE = 256  # عدد تفريغات المشهد الأول المحفوظة حسب بصمة النص
+
+SALIENCE_CRITERIA = {
+    "character_development": 0.3,
+    "plot_advancement": 0.35,
+    "emotional_impact": 0.2,
+    "visual_complexity": 0.15,
+}
+SALIENCE_KEYS = tuple(SALIENCE_CRITERIA)
+SALIENCE_WEIGHTS = np.array([SALIENCE_CRITERIA[k] for k in SALIENCE_KEYS], dtype=np.float32)
+# معامل تحويل عدد التطابقات إلى درجة لكل معيار (بنفس ترتيب SALIENCE_KEYS)
+SALIENCE_SCALES = np.array([0.2, 0.25, 0.2, 0.15], dtype=np.float32)
+
+# ═══════════════════════════════════════════════════════════════════════════
+# تقسيم السيناريو إلى مشاهد
+# ═══════════════════════════════════════════════════════════════════════════
+
+SCENE_NUMBER_RE = re.compile(r'^\s*(?:مشهد|scene)\s*(\d+)', re.I)
+# نفس العنوان متعدد الأسطر: مرور واحد بـ finditer يعطي كل بدايات المشاهد
+SCENE_HEADER_RE = re.compile(r'^\s*(?:مشهد|scene)\s*\d+', re.I | re.M)
+_HEADER_AR = np.frombuffer("مشهد".encode("utf-8"), dtype=np.uint8)
+_HEADER_EN = np.frombuffer(b"scene", dtype=np.uint8)
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _find_scene_starts(buf: np.ndarray, header_ar: np.ndarray, header_en: np.ndarray):
+        """
+        إرجاع إزاحات (بالبايت) بدايات الأسطر التي تبدأ بـ "مشهد N" أو "scene N"
+        في مرور واحد على نص UTF-8 مرمّز كمصفوفة uint8، مع موضع أول بايت بعد العنوان.
+        الرقم اللاتيني يُقبل مباشرة؛ أي حرف غير ASCII يُعاد كمرشح يتحقق منه المستدعي
+        بـ str.isdecimal ليطابق \\d في SCENE_HEADER_RE (كل أرقام Unicode العشرية)
+        """
+        n = buf.shape[0]
+        starts = np.empty(n // 2 + 1, dtype=np.int64)
+        digit_at = np.empty(n // 2 + 1, dtype=np.int64)
+        count = 0
+        line_start = 0
+        while line_start < n:
+            j = line_start
+            while j < n and (buf[j] == 32 or buf[j] == 9 or buf[j] == 13):
+                j += 1
+            
+            matched = 0
+            if j + header_ar.shape[0] <= n:
+                matched = header_ar.shape[0]
+                for k in range(header_ar.shape[0]):
+                    if buf[j + k] != header_ar[k]:
+                        matched = 0
+                        break
+            if matched == 0 and j + header_en.shape[0] <= n:
+                matched = header_en.shape[0]
+                for k in range(header_en.shape[0]):
+                    # مقارنة ASCII غير حساسة لحالة الأحرف
+                    if (buf[j + k] | 32) != header_en[k]:
+                        matched = 0
+                        break
+            
+            if matched > 0:
+                j += matched
+                while j < n and (buf[j] == 32 or buf[j] == 9 or buf[j] == 13 or buf[j] == 10):
+                    j += 1
+                # رقم لاتيني، أو بايت بادئ لحرف متعدد البايتات قد يكون رقماً عشرياً
+                if j < n and ((48 <= buf[j] <= 57) or buf[j] >= 0xC0):
+                    starts[count] = line_start
+                    digit_at[count] = j
+                    count += 1
+            
+            while line_start < n and buf[line_start] != 10:
+                line_start += 1
+            line_start += 1
+        return starts[:count], digit_at[:count]
+
+
+def warm_scene_scanner():
+    """ترجمة ماسح العناوين (أو تحميله من ذاكرة Numba المؤقتة) عند بدء الخدمة لا عند الاستيراد"""
+    if NUMBA_AVAILABLE:
+        _find_scene_starts(np.frombuffer(b"scene 1\n", dtype=np.uint8), _HEADER_AR, _HEADER_EN)
+
+
+def split_script_scenes(text: str) -> List[tuple]:
+    """تقسيم السيناريو إلى (رقم المشهد، نص المشهد) بنفس دلالات split_scenes"""
+    if NUMBA_AVAILABLE:
+        data = text.encode("utf-8")
+        offsets, digit_at = _find_scene_starts(np.frombuffer(data, dtype=np.uint8), _HEADER_AR, _HEADER_EN)
+        bounds = [
+            start for start, at in zip(offsets.tolist(), digit_at.tolist())
+            if data[at] < 0x80 or data[at:at + 4].decode("utf-8", "ignore")[:1].isdecimal()
+        ] + [len(data)]
+        blocks = (data[start:end].decode("utf-8") for start, end in zip(bounds, bounds[1:]))
+    else:
+        bounds = [m.start() for m in SCENE_HEADER_RE.finditer(text)] + [len(text)]
+        blocks = (text[start:end] for start, end in zip(bounds, bounds[1:]))
+    
+    scenes = []
+    for block in blocks:
+        block = block.strip()
+        match = SCENE_NUMBER_RE.match(block)
+        if match:
+            scenes.append((match.group(1), block))
+    return scenes
+
+
+def text_digest(text: str) -> bytes:
+    """بصمة قصيرة للنص تُستخدم مفتاحاً للتخزين المؤقت"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def score_scene_salience(text: str) -> Dict[str, Any]:
+    """تحليل أهمية المشاهد؛ دالة متزامنة على مستوى الوحدة لتعمل في مجمّع العمليات"""
+    scenes_data = split_script_scenes(text)
+    if not scenes_data:
+        scenes_data = [("1", text)]
+    
+    # بنية مصفوفات (SoA): صف لكل مشهد وعمود لكل معيار
+    n = len(scenes_data)
+    counts = np.zeros((n, len(SALIENCE_KEYS)), dtype=np.float32)
+    scene_characters = []
+    for i, (scene_num, scene_text) in enumerate(scenes_data):
+        # تصغير النص مرة واحدة لكل مشهد
+        content = scene_text.lower()
+        # إزالة التكرار مع الحفاظ على ترتيب ظهور الشخصيات
+        characters = list(dict.fromkeys(DIALOGUE_RE.findall(scene_text)))
+        scene_characters.append(characters)
+        counts[i, 0] = len(characters)
+        hits = Counter(m.lastgroup for m in SALIENCE_KEYWORDS_RE.finditer(content))
+        counts[i, 1] = hits["plot"]
+        counts[i, 2] = hits["emotion"]
+        counts[i, 3] = hits["visual"]
+    
+    breakdowns = np.minimum(counts * SALIENCE_SCALES, 1.0)
+    scores = breakdowns @ SALIENCE_WEIGHTS
+    
+    results = [
+        {
+            "scene_number": scene_num,
+            "importance_score": round(float(score), 3),
+            "breakdown": {key: round(float(v), 3) for key, v in zip(SALIENCE_KEYS, row)},
+            "characters": characters
+        }
+        for (scene_num, _), score, row, characters
+        in zip(scenes_data, scores, breakdowns, scene_characters)
+    ]
+    
+    return {
+        "scene_analyses": results,
+        "summary": {
+            "total_scenes": n,
+            "high_importance": int(np.count_nonzero(scores > 0.7)),
+            "medium_importance": int(np.count_nonzero((scores >= 0.4) & (scores <= 0.7))),
+            "low_importance": int(np.count_nonzero(scores < 0.4)),
+            "average_importance": round(float(scores.mean()), 3)
+        },
+        "analysis_method": "keyword_regex",
+        "confidence": 0.75
+    }
+
+@lru_cache(maxsize=1)
+def _get_revolutionary_system() -> "MasterRevolutionarySystem":
+    """نظام ثوري واحد لكل عملية عاملة"""
+    return MasterRevolutionarySystem()
+
+
+def run_revolutionary_analysis(scenes_data: List[tuple]) -> Dict[str, Any]:
+    """التحليل الثوري لقائمة (رقم المشهد، النص) داخل عملية عاملة"""
+    advanced_scenes = []
+    for scene_num, scene_text in scenes_data:
+        # إنشاء AdvancedSceneData
+        scene = AdvancedSceneData(scene_number=scene_num)
+        scene.original_text = scene_text
+        advanced_scenes.append(scene)
+    
+    # تطبيق التحليل الثوري
+    system = _get_revolutionary_system()
+    processed_scenes = asyncio.run(system.process_complete_analysis(advanced_scenes))
+    
+    # تحويل النتائج إلى بيانات بسيطة قابلة للنقل بين العمليات
+    results = []
+    for scene in processed_scenes:
+        results.append({
+            "scene_number": scene.scene_number,
+            "ai_confidence": scene.ai_confidence,
+            "success_probability": scene.success_probability,
+            "quantum_advantage": scene.quantum_state.quantum_advantage if scene.quantum_state else 0,
+            "neuromorphic_activation": scene.neuromorphic_activation,
+            "consciousness_level": scene.consciousness_level,
+            "creative_alternatives": scene.creative_alternatives,
+            "audience_reactions": scene.audience_reactions
+        })
+    
+    return {
+        "revolutionary_results": results,
+        "total_scenes": len(processed_scenes),
+        "avg_confidence": sum(s.ai_confidence for s in processed_scenes) / len(processed_scenes),
+        "analysis_method": "revolutionary_system"
+    }
+
 # ═══════════════════════════════════════════════════════════════════════════
 # نماذج البيانات (Data Models)
 # ═══════════════════════════════════════════════════════════════════════════
@@ -96,6 +368,8 @@ class AdvancedAnalysisResponse(BaseModel):
     metadata: Dict[str, Any]
 
 class JobStatus(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    
     job_id: str
     status: Literal["pending", "processing", "completed", "failed"]
     progress: float
@@ -104,26 +378,45 @@ class JobStatus(BaseModel):
     created_at: datetime
     updated_at: datetime
 
+class JobListResponse(BaseModel):
+    jobs: List[JobStatus]
+    total: int
+
 # ═══════════════════════════════════════════════════════════════════════════
 # مدير الوظائف (Job Manager)
 # ═══════════════════════════════════════════════════════════════════════════
 
+JOB_STATUSES = ("pending", "processing", "completed", "failed")
+FINISHED_STATUSES = ("completed", "failed")
+MAX_JOBS_IN_MEMORY = 10_000
+JOB_TTL_SECONDS = 24 * 3600  # مدة الاحتفاظ بالوظائف المنتهية
+JOB_PURGE_INTERVAL = 600.0
+
 class JobManager:
-    def __init__(self):
+    def __init__(self, max_concurrent_jobs: int = 5):
         self.jobs: Dict[str, JobStatus] = {}
-        self.max_jobs = 100  # حد أقصى للوظائف المحفوظة
+        self.max_jobs = MAX_JOBS_IN_MEMORY  # حد أقصى للوظائف المحفوظة
+        self.max_concurrent_jobs = max_concurrent_jobs
+        # طابور الوظائف المعلّقة، تستهلكه عمال lifespan بعدد max_concurrent_jobs
+        self.processing_queue: asyncio.Queue = asyncio.Queue()
+        # فهرس الوظائف حسب الحالة لتصفية /jobs دون مسح كامل
+        self._by_status: Dict[str, "OrderedDict[str, JobStatus]"] = {
+            status: OrderedDict() for status in JOB_STATUSES
+        }
     
     def create_job(self) -> str:
         job_id = str(uuid.uuid4())
         now = datetime.now()
         
-        self.jobs[job_id] = JobStatus(
+        job = JobStatus(
             job_id=job_id,
             status="pending",
             progress=0.0,
             created_at=now,
             updated_at=now
         )
+        self.jobs[job_id] = job
+        self._by_status["pending"][job_id] = job
         
         # تنظيف الوظائف القديمة
         self._cleanup_old_jobs()
@@ -131,26 +424,65 @@ class JobManager:
         return job_id
     
     def update_job(self, job_id: str, **kwargs):
-        if job_id in self.jobs:
-            job = self.jobs[job_id]
-            for key, value in kwargs.items():
-                if hasattr(job, key):
-                    setattr(job, key, value)
-            job.updated_at = datetime.now()
+        job = self.jobs.get(job_id)
+        if job is not None:
+            self.update(job, **kwargs)
+    
+    def update(self, job: JobStatus, **kwargs):
+        """تحديث وظيفة بمرجعها مباشرة، دون البحث عنها في القاموس"""
+        old_status = job.status
+        for key, value in kwargs.items():
+            if hasattr(job, key):
+                setattr(job, key, value)
+        job.updated_at = datetime.now()
+        
+        if job.status != old_status:
+            # نقل الوظيفة إلى دلو حالتها الجديدة (تُرتَّب بوقت دخولها إليه)
+            del self._by_status[old_status][job.job_id]
+            self._by_status[job.status][job.job_id] = job
     
     def get_job(self, job_id: str) -> Optional[JobStatus]:
         return self.jobs.get(job_id)
     
+    def get_all_jobs(self, status: Optional[str] = None, limit: int = 100) -> List[JobStatus]:
+        """أحدث الوظائف إنشاءً أولاً، دون فرز أو مسح لكامل السجل عند تحديد الحالة"""
+        if not status:
+            # self.jobs مرتب بوقت الإنشاء
+            return list(islice(reversed(self.jobs.values()), limit))
+        # الدلو مرتب بوقت دخول الحالة (يعتمد عليه purge_expired)، فتُختار أحدث
+        # limit وظيفة إنشاءً من الدلو وحده في O(حجم الدلو × log limit)
+        return heapq.nlargest(limit, self._by_status[status].values(), key=attrgetter("created_at"))
+    
+    def purge_expired(self) -> int:
+        """حذف الوظائف المنتهية التي تجاوزت JOB_TTL_SECONDS"""
+        cutoff = datetime.now() - timedelta(seconds=JOB_TTL_SECONDS)
+        purged = 0
+        for status in FINISHED_STATUSES:
+            bucket = self._by_status[status]
+            # الدلو مرتب بوقت الانتهاء، فنتوقف عند أول وظيفة غير منتهية الصلاحية
+            while bucket:
+                job_id, job = next(iter(bucket.items()))
+                if job.updated_at >= cutoff:
+                    break
+                self._remove(job_id)
+                purged += 1
+        return purged
+    
+    def _remove(self, job_id: str):
+        job = self.jobs.pop(job_id)
+        del self._by_status[job.status][job_id]
+    
     def _cleanup_old_jobs(self):
-        if len(self.jobs) > self.max_jobs:
-            # حذف أقدم الوظائف
-            sorted_jobs = sorted(
-                self.jobs.items(),
-                key=lambda x: x[1].created_at
-            )
-            
-            for job_id, _ in sorted_jobs[:len(self.jobs) - self.max_jobs]:
-                del self.jobs[job_id]
+        # يُحذف الأقدم انتهاءً فقط؛ الوظائف قيد التنفيذ لا تُحذف أبداً
+        while len(self.jobs) > self.max_jobs:
+            oldest = [
+                next(iter(self._by_status[status].values()), None)
+                for status in FINISHED_STATUSES
+            ]
+            oldest = [job for job in oldest if job is not None]
+            if not oldest:
+                break
+            self._remove(min(oldest, key=lambda job: job.updated_at).job_id)
 
 # ═══════════════════════════════════════════════════════════════════════════
 # معالجات المكونات (Component Processors)
@@ -162,6 +494,10 @@ class ComponentProcessor:
     def __init__(self):
         self.revolutionary_system = None
         self.ultimate_parser = None
+        # نتائج score_scene_salience الحتمية، مفهرسة ببصمة النص (LRU)
+        self._salience_cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+        # تفريغ أول مشهد مشترك بين مكونات الملخص والدعائم والأزياء والأنماط
+        self._breakdown_cache: "OrderedDict[bytes, Any]" = OrderedDict()
         
         # تهيئة الأنظمة المتاحة
         if REVOLUTIONARY_AVAILABLE:
@@ -178,16 +514,35 @@ class ComponentProcessor:
             except Exception as e:
                 logger.error(f"❌ فشل تهيئة Ultimate Parser: {e}")
     
+    async def _first_scene_breakdown(self, text: str) -> Optional["DetailedBreakdown"]:
+        """
+        تفريغ أول مشهد في النص عبر Ultimate Parser، محسوب مرة واحدة لكل نص:
+        الواجهة تطلب عادةً عدة مكونات للمشهد نفسه، وكلها تقرأ من التفريغ ذاته
+        """
+        key = text_digest(text)
+        breakdown = self._breakdown_cache.get(key)
+        if breakdown is not None:
+            self._breakdown_cache.move_to_end(key)
+            return breakdown
+        
+        scenes_data = split_script_scenes(text)
+        if not scenes_data:
+            return None
+        scene_num, scene_text = scenes_data[0]  # أول مشهد
+        breakdown = await self.ultimate_parser.analyze_scene(scene_text, scene_num)
+        
+        self._breakdown_cache[key] = breakdown
+        if len(self._breakdown_cache) > BREAKDOWN_CACHE_SIZE:
+            self._breakdown_cache.popitem(last=False)
+        return breakdown
+    
     async def process_semantic_synopsis(self, request: AdvancedAnalysisRequest) -> Dict[str, Any]:
         """توليد ملخص دلالي للنص"""
         try:
             # استخدام Ultimate System إذا كان متاحاً
             if self.ultimate_parser:
-                scenes_data = split_scenes(request.text)
-                if scenes_data:
-                    scene_num, scene_text = scenes_data[0]  # أول مشهد
-                    breakdown = await self.ultimate_parser.analyze_scene(scene_text, scene_num)
-                    
+                breakdown = await self._first_scene_breakdown(request.text)
+                if breakdown:
                     return {
                         "synopsis": breakdown.summary,
                         "scene_type": str(breakdown.scene_type),
@@ -208,11 +563,8 @@ class ComponentProcessor:
         """تصنيف الدعائم والعناصر"""
         try:
             if self.ultimate_parser:
-                scenes_data = split_scenes(request.text)
-                if scenes_data:
-                    scene_num, scene_text = scenes_data[0]
-                    breakdown = await self.ultimate_parser.analyze_scene(scene_text, scene_num)
-                    
+                breakdown = await self._first_scene_breakdown(request.text)
+                if breakdown:
                     return {
                         "props": breakdown.props_list,
                         "props_html": breakdown.props_html,
@@ -232,11 +584,8 @@ class ComponentProcessor:
         """استنتاج الأزياء"""
         try:
             if self.ultimate_parser:
-                scenes_data = split_scenes(request.text)
-                if scenes_data:
-                    scene_num, scene_text = scenes_data[0]
-                    breakdown = await self.ultimate_parser.analyze_scene(scene_text, scene_num)
-                    
+                breakdown = await self._first_scene_breakdown(request.text)
+                if breakdown:
                     wardrobe_items = []
                     for spec in breakdown.wardrobe_specs:
                         wardrobe_items.append({
@@ -263,11 +612,8 @@ class ComponentProcessor:
         """تحليل الأنماط السينمائية"""
         try:
             if self.ultimate_parser:
-                scenes_data = split_scenes(request.text)
-                if scenes_data:
-                    scene_num, scene_text = scenes_data[0]
-                    breakdown = await self.ultimate_parser.analyze_scene(scene_text, scene_num)
-                    
+                breakdown = await self._first_scene_breakdown(request.text)
+                if breakdown:
                     return {
                         "cinematic_notes": breakdown.cinematic_notes,
                         "camera_lighting": breakdown.camera_lighting,
@@ -286,7 +632,7 @@ class ComponentProcessor:
         """فحص الاستمرارية"""
         try:
             if self.ultimate_parser:
-                scenes_data = split_scenes(request.text)
+                scenes_data = split_script_scenes(request.text)
                 continuity_issues = []
                 
                 for i, (scene_num, scene_text) in enumerate(scenes_data):
@@ -319,39 +665,10 @@ class ComponentProcessor:
         """التحليل الثوري المتقدم"""
         try:
             if self.revolutionary_system and REVOLUTIONARY_AVAILABLE:
-                # تحويل النص إلى مشاهد
-                scenes_data = split_scenes(request.text)
-                advanced_scenes = []
-                
-                for scene_num, scene_text in scenes_data:
-                    # إنشاء AdvancedSceneData
-                    scene = AdvancedSceneData(scene_number=scene_num)
-                    scene.original_text = scene_text
-                    advanced_scenes.append(scene)
-                
-                # تطبيق التحليل الثوري
-                processed_scenes = await self.revolutionary_system.process_complete_analysis(advanced_scenes)
-                
-                # تحويل النتائج
-                results = []
-                for scene in processed_scenes:
-                    results.append({
-                        "scene_number": scene.scene_number,
-                        "ai_confidence": scene.ai_confidence,
-                        "success_probability": scene.success_probability,
-                        "quantum_advantage": scene.quantum_state.quantum_advantage if scene.quantum_state else 0,
-                        "neuromorphic_activation": scene.neuromorphic_activation,
-                        "consciousness_level": scene.consciousness_level,
-                        "creative_alternatives": scene.creative_alternatives,
-                        "audience_reactions": scene.audience_reactions
-                    })
-                
-                return {
-                    "revolutionary_results": results,
-                    "total_scenes": len(processed_scenes),
-                    "avg_confidence": sum(s.ai_confidence for s in processed_scenes) / len(processed_scenes),
-                    "analysis_method": "revolutionary_system"
-                }
+                # المحركات الثورية عمل معالج ثقيل: تُنفَّذ في مجمّع العمليات
+                scenes_data = split_script_scenes(request.text)
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(app.state.executor, run_revolutionary_analysis, scenes_data)
             
             return {"error": "Revolutionary System غير متاح", "fallback_used": True}
             
@@ -359,20 +676,40 @@ class ComponentProcessor:
             logger.error(f"خطأ في التحليل الثوري: {e}")
             return {"error": str(e), "fallback_used": True}
     
+    async def process_scene_salience(self, request: AdvancedAnalysisRequest) -> Dict[str, Any]:
+        """تحليل أهمية المشاهد (عمل معالج خالص، يُنفَّذ خارج حلقة الأحداث)"""
+        key = text_digest(request.text)
+        cached = self._salience_cache.get(key)
+        if cached is not None:
+            self._salience_cache.move_to_end(key)
+            return cached
+        
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(app.state.executor, score_scene_salience, request.text)
+        
+        self._salience_cache[key] = result
+        if len(self._salience_cache) > SALIENCE_CACHE_SIZE:
+            self._salience_cache.popitem(last=False)
+        return result
+    
     # ═══════════════════════════════════════════════════════════════════════
     # Fallback Methods
     # ═══════════════════════════════════════════════════════════════════════
     
     async def _fallback_synopsis(self, text: str) -> Dict[str, Any]:
         """ملخص احتياطي بسيط"""
-        lines = [l.strip() for l in text.split('\n') if l.strip()]
+        # قراءة الأسطر تدفقياً دون بناء قائمة بكل أسطر النص
+        lines = filter(None, (l.strip() for l in io.StringIO(text)))
+        next(lines, None)  # تجاهل العنوان
         
         # استخراج أول جملة وصفية
         description_lines = []
-        for line in lines[1:]:  # تجاهل العنوان
+        joined_length = -1  # طول ' '.join(description_lines)
+        for line in lines:
             if ':' not in line and len(line) > 20:
                 description_lines.append(line)
-                if len(' '.join(description_lines)) > 150:
+                joined_length += len(line) + 1
+                if joined_length > 150:
                     break
         
         synopsis = ' '.join(description_lines)
@@ -390,17 +727,7 @@ class ComponentProcessor:
     
     async def _fallback_prop_classification(self, text: str) -> Dict[str, Any]:
         """تصنيف احتياطي للدعائم"""
-        text_lower = text.lower()
-        
-        basic_props = []
-        prop_keywords = [
-            'ظرف', 'هاتف', 'موبايل', 'لابتوب', 'حاسب', 'مجلة', 
-            'حقيبة', 'كأس', 'كوب', 'مفتاح', 'نظارة', 'ساعة'
-        ]
-        
-        for keyword in prop_keywords:
-            if keyword in text_lower:
-                basic_props.append(keyword)
+        basic_props = find_prop_keywords(text.lower())
         
         return {
             "props": basic_props,
@@ -450,10 +777,37 @@ class ComponentProcessor:
 # تطبيق FastAPI
 # ═══════════════════════════════════════════════════════════════════════════
 
+# مجمّع عمليات للتحليلات المعتمدة على المعالج حتى لا تحجب حلقة الأحداث؛
+# يُنشأ في lifespan ويُحفظ في app.state.executor
+ANALYSIS_WORKERS = os.cpu_count() or 1
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # مجمّع لكل تشغيل للتطبيق: إعادة التشغيل في نفس العملية لا ترث مجمّعاً مغلقاً
+    executor = ProcessPoolExecutor(max_workers=ANALYSIS_WORKERS)
+    app.state.executor = executor
+    # الطابور يرتبط بحلقة الأحداث عند أول انتظار، فيُنشأ لكل تشغيل مع عماله
+    job_manager.processing_queue = asyncio.Queue()
+    await asyncio.to_thread(warm_scene_scanner)
+    workers = [
+        asyncio.create_task(job_worker())
+        for _ in range(job_manager.max_concurrent_jobs)
+    ]
+    workers.append(asyncio.create_task(job_purger()))
+    try:
+        yield
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        executor.shutdown(wait=False, cancel_futures=True)
+
 app = FastAPI(
     title="Python Brain Service",
     description="خدمة Python المتقدمة للتكامل مع نظام Multi-Agent للتفريغ السينمائي",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse if ORJSON_AVAILABLE else JSONResponse
 )
 
 # إعداد CORS
@@ -469,6 +823,7 @@ app.add_middleware(
 job_manager = JobManager()
 processor = ComponentProcessor()
 
+
 # ═══════════════════════════════════════════════════════════════════════════
 # نقاط النهاية (Endpoints)
 # ═══════════════════════════════════════════════════════════════════════════
@@ -486,11 +841,11 @@ async def root():
     }
 
 @app.post("/analyze/async")
-async def start_analysis(request: AdvancedAnalysisRequest, background_tasks: BackgroundTasks):
+async def start_analysis(request: AdvancedAnalysisRequest):
     """بدء تحليل غير متزامن"""
     job_id = job_manager.create_job()
     
-    background_tasks.add_task(process_analysis, job_id, request)
+    await job_manager.processing_queue.put((job_id, request))
     
     return {
         "job_id": job_id,
@@ -498,7 +853,7 @@ async def start_analysis(request: AdvancedAnalysisRequest, background_tasks: Bac
         "message": "تم بدء التحليل"
     }
 
-@app.get("/jobs/{job_id}")
+@app.get("/jobs/{job_id}", response_model=JobStatus, response_model_exclude_none=True)
 async def get_job_status(job_id: str):
     """الحصول على حالة الوظيفة"""
     job = job_manager.get_job(job_id)
@@ -508,11 +863,14 @@ async def get_job_status(job_id: str):
     
     return job
 
-@app.get("/jobs")
-async def list_jobs():
-    """قائمة جميع الوظائف"""
+@app.get("/jobs", response_model=JobListResponse, response_model_exclude_none=True)
+async def list_jobs(
+    status: Optional[Literal["pending", "processing", "completed", "failed"]] = None,
+    limit: int = Query(100, ge=1, le=MAX_JOBS_IN_MEMORY)
+):
+    """قائمة الوظائف (الأحدث أولاً)، مع تصفية اختيارية حسب الحالة"""
     return {
-        "jobs": list(job_manager.jobs.values()),
+        "jobs": job_manager.get_all_jobs(status, limit),
         "total": len(job_manager.jobs)
     }
 
@@ -548,8 +906,13 @@ async def analyze_sync(request: AdvancedAnalysisRequest):
 
 async def process_analysis(job_id: str, request: AdvancedAnalysisRequest):
     """معالجة التحليل في الخلفية"""
+    # جلب الوظيفة مرة واحدة وتحديثها بمرجعها طوال المعالجة
+    job = job_manager.get_job(job_id)
+    if job is None:
+        return
+    
     try:
-        job_manager.update_job(job_id, status="processing", progress=0.1)
+        job_manager.update(job, status="processing", progress=0.1)
         
         start_time = datetime.now()
         
@@ -573,8 +936,8 @@ async def process_analysis(job_id: str, request: AdvancedAnalysisRequest):
             }
         )
         
-        job_manager.update_job(
-            job_id,
+        job_manager.update(
+            job,
             status="completed",
             progress=1.0,
             result=response
@@ -586,12 +949,30 @@ async def process_analysis(job_id: str, request: AdvancedAnalysisRequest):
         error_msg = f"خطأ في معالجة الوظيفة: {str(e)}"
         logger.error(f"❌ {error_msg}\n{traceback.format_exc()}")
         
-        job_manager.update_job(
-            job_id,
+        job_manager.update(
+            job,
             status="failed",
             error=error_msg
         )
 
+async def job_worker():
+    """عامل دائم يسحب الوظائف من الطابور؛ عدد العمال يحدّ التوازي"""
+    queue = job_manager.processing_queue
+    while True:
+        job_id, request = await queue.get()
+        try:
+            await process_analysis(job_id, request)
+        finally:
+            queue.task_done()
+
+async def job_purger():
+    """تنظيف دوري للوظائف المنتهية الصلاحية"""
+    while True:
+        await asyncio.sleep(JOB_PURGE_INTERVAL)
+        purged = job_manager.purge_expired()
+        if purged:
+            logger.info(f"🧹 تم حذف {purged} وظيفة منتهية الصلاحية")
+
 async def process_component(request: AdvancedAnalysisRequest) -> Dict[str, Any]:
     """معالجة المكون المحدد"""
     
@@ -607,6 +988,9 @@ async def process_component(request: AdvancedAnalysisRequest) -> Dict[str, Any]:
     elif request.component == ProcessingComponent.CINEMATIC_PATTERNS:
         return await processor.process_cinematic_patterns(request)
     
+    elif request.component == ProcessingComponent.SCENE_SALIENCE:
+        return await processor.process_scene_salience(request)
+    
     elif request.component == ProcessingComponent.CONTINUITY_CHECK:
         return await processor.process_continuity_check(request)
     
@@ -644,9 +1028,18 @@ if __name__ == "__main__":
     logger.info(f"Revolutionary System: {'✅ متاح' if REVOLUTIONARY_AVAILABLE else '❌ غير متاح'}")
     logger.info(f"Ultimate System: {'✅ متاح' if ULTIMATE_AVAILABLE else '❌ غير متاح'}")
     
+    # uvloop (libuv) أسرع من حلقة asyncio الافتراضية؛ نعود إليها إن لم يكن مثبتاً
+    try:
+        import uvloop  # noqa: F401
+        event_loop = "uvloop"
+    except ImportError:
+        event_loop = "asyncio"
+    logger.info(f"حلقة الأحداث: {event_loop}")
+    
     uvicorn.run(
         app,
         host="0.0.0.0",
         port=8000,
-        log_level="info"
+        log_level="info",
+        loop=event_loop
     )
\ No newline at end of file
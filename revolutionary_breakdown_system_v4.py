@@ -33,7 +33,7 @@ import asyncio
 import logging
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import List, Dict, Set, Optional, Tuple, Pattern
+from typing import List, Dict, Set, Optional, Tuple, Pattern, Iterator, TextIO
 from pathlib import Path
 from enum import Enum
 from collections import defaultdict
@@ -1016,14 +1016,14 @@ class HTMLRenderer:
 """
     
     @staticmethod
-    def render_full_document(scenes: List[DetailedBreakdown]) -> str:
-        """توليد المستند الكامل"""
+    def iter_full_document(scenes: List[DetailedBreakdown]) -> Iterator[str]:
+        """
+        توليد المستند الكامل كأجزاء متتالية (رأس، مشهد بمشهد، تذييل)
+        دون بناء النص الكامل في الذاكرة
+        """
         total = len(scenes)
-        scenes_html = "".join([
-            HTMLRenderer.render_scene(s, total) for s in scenes
-        ])
         
-        return f"""<!doctype html>
+        yield f"""<!doctype html>
 <html lang="ar" dir="rtl">
 <head>
   <meta charset="utf-8" />
@@ -1032,9 +1032,24 @@ class HTMLRenderer:
   <style>{HTMLRenderer.CSS}</style>
 </head>
 <body>
-{scenes_html}
+"""
+        for s in scenes:
+            yield HTMLRenderer.render_scene(s, total)
+        
+        yield """
 </body>
 </html>"""
+    
+    @staticmethod
+    def stream_full_document(scenes: List[DetailedBreakdown], writable: TextIO):
+        """كتابة المستند الكامل تدريجياً إلى ملف مفتوح"""
+        for chunk in HTMLRenderer.iter_full_document(scenes):
+            writable.write(chunk)
+    
+    @staticmethod
+    def render_full_document(scenes: List[DetailedBreakdown]) -> str:
+        """توليد المستند الكامل"""
+        return "".join(HTMLRenderer.iter_full_document(scenes))
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -6,6 +6,12 @@ from advanced_python_brain_service import app
 
 client = TestClient(app)
 
+@pytest.fixture(autouse=True)
+def running_app():
+    # Run the app lifespan so the analysis process pool exists
+    with client:
+        yield
+
 @pytest.fixture
 def sample_script():
     content = """
@@ -74,3 +80,207 @@ def test_invalid_job_id():
 def test_report_not_found_for_invalid_id():
     response = client.get("/api/report/invalid-id")
     assert response.status_code == 404
+
+def _upload_and_wait(path):
+    with open(path, "rb") as f:
+        response = client.post(
+            "/api/upload",
+            files={"file": ("test_script.txt", f, "text/plain")},
+            data={"wardrobe_inference": "true", "legal_alerts": "false"}
+        )
+    job_id = response.json()["job_id"]
+    for _ in range(10):
+        status_data = client.get(f"/api/status/{job_id}").json()
+        if status_data["status"] in ["completed", "failed"]:
+            break
+        time.sleep(1)
+    return status_data
+
+def test_repeat_upload_reuses_cached_report(sample_script, tmp_path, monkeypatch):
+    import advanced_python_brain_service as service
+
+    # Private cache so earlier tests cannot pre-fill it
+    monkeypatch.setattr(service, "CACHE_DIR", tmp_path)
+    lookups = []
+    load_cached_report = service.load_cached_report
+
+    def recording_load(cache_key, output_path):
+        hit = load_cached_report(cache_key, output_path)
+        lookups.append(hit is not None)
+        return hit
+
+    monkeypatch.setattr(service, "load_cached_report", recording_load)
+
+    first = _upload_and_wait(sample_script)
+    second = _upload_and_wait(sample_script)
+
+    assert lookups == [False, True]
+    assert first["status"] == "completed"
+    assert second["status"] == "completed"
+    assert second["total_scenes"] == first["total_scenes"] == 2
+
+    first_report = client.get(first["result_url"]).text
+    second_report = client.get(second["result_url"]).text
+    assert second_report == first_report
+
+def test_report_cache_prunes_least_recently_used(tmp_path, monkeypatch):
+    import advanced_python_brain_service as service
+
+    monkeypatch.setattr(service, "CACHE_DIR", tmp_path)
+    report = tmp_path / "report.html"
+    report.write_text("<html></html>", encoding="utf-8")
+
+    for index, key in enumerate(["a", "b", "c"]):
+        service.store_cached_report(key, report, total_scenes=index)
+        os.utime(tmp_path / f"{key}.json", (index, index))
+    service.prune_report_cache(max_entries=2)
+
+    assert service.load_cached_report("a", tmp_path / "out.html") is None
+    assert service.load_cached_report("c", tmp_path / "out.html") == 2
+    assert not list(tmp_path.glob(".*.tmp"))
+
+def test_job_store_evicts_finished_jobs_to_sqlite(tmp_path):
+    import asyncio
+    from datetime import datetime
+    from advanced_python_brain_service import LRUJobStore
+
+    store = LRUJobStore(tmp_path / "jobs.db", capacity=2)
+    for job_id, status in [("a", "completed"), ("b", "processing"), ("c", "pending")]:
+        store[job_id] = {
+            "status": status, "progress": 100 if status == "completed" else 0,
+            "total_scenes": 3, "message": "", "result_path": f"/tmp/{job_id}.html",
+            "error": None, "timestamp": datetime.now()
+        }
+        asyncio.run(store.persist(job_id))
+
+    # Only the finished job is evicted; active jobs stay in memory
+    assert len(store) == 2
+    assert store.get("b")["status"] == "processing"
+
+    evicted = store.get("a")
+    assert evicted["status"] == "completed"
+    assert evicted["result_path"] == "/tmp/a.html"
+    assert store.get("missing") is None
+
+def test_status_websocket_pushes_until_completed(sample_script):
+    with open(sample_script, "rb") as f:
+        response = client.post(
+            "/api/upload",
+            files={"file": ("test_script.txt", f, "text/plain")},
+            data={"wardrobe_inference": "false", "legal_alerts": "true"}
+        )
+    job_id = response.json()["job_id"]
+
+    frames = []
+    with client.websocket_connect(f"/api/ws/status/{job_id}") as ws:
+        while True:
+            frame = ws.receive_json()
+            frames.append(frame)
+            if frame["status"] in ["completed", "failed"]:
+                break
+
+    assert frames[-1]["status"] == "completed"
+    assert frames[-1]["result_url"] == f"/api/report/{job_id}"
+
+def _minimal_pdf(lines):
+    """Build a one-page PDF whose text layer holds `lines` (Helvetica)."""
+    text_ops = " ".join(f"({line}) Tj 0 -20 Td" for line in lines)
+    stream = f"BT /F1 12 Tf 72 720 Td {text_ops} ET".encode("latin-1")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+    ]
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return pdf
+
+def test_pdf_upload_with_txt_name():
+    pytest.importorskip("pypdfium2")
+    pdf = _minimal_pdf(["Scene 1 interior day", "Ahmed enters.", "Scene 2 exterior night", "Sara leaves."])
+
+    response = client.post(
+        "/api/upload",
+        files={"file": ("x.txt", pdf, "application/pdf")},
+        data={"wardrobe_inference": "false", "legal_alerts": "false"}
+    )
+    assert response.status_code == 200
+    job_id = response.json()["job_id"]
+
+    for _ in range(10):
+        status_data = client.get(f"/api/status/{job_id}").json()
+        if status_data["status"] in ["completed", "failed"]:
+            break
+        time.sleep(1)
+
+    assert status_data["status"] == "completed", status_data["error"]
+    assert status_data["total_scenes"] == 2
+
+def test_status_websocket_sends_completion_that_lands_mid_send():
+    import asyncio
+    import json
+    from datetime import datetime
+    from advanced_python_brain_service import jobs, update_job, status_updates
+
+    class SlowWebSocket:
+        """Completes the job while the first frame is still being sent."""
+        def __init__(self, job_id):
+            self.job_id = job_id
+            self.frames = []
+
+        async def accept(self):
+            pass
+
+        async def send_text(self, text):
+            if not self.frames:
+                await asyncio.sleep(0)
+                update_job(self.job_id, status="completed", progress=100, result_path="/tmp/r.html")
+            self.frames.append(text)
+
+        async def close(self, code=1000, reason=None):
+            pass
+
+    async def run():
+        job_id = "mid-send-job"
+        jobs[job_id] = {
+            "status": "processing", "progress": 50, "total_scenes": 1,
+            "message": "", "result_path": None, "error": None,
+            "timestamp": datetime.now(), "version": 0, "event": asyncio.Event()
+        }
+        ws = SlowWebSocket(job_id)
+        await asyncio.wait_for(status_updates(ws, job_id), timeout=5)
+        return ws.frames
+
+    frames = [json.loads(frame) for frame in asyncio.run(run())]
+    assert [frame["status"] for frame in frames] == ["processing", "completed"]
+
+def test_app_restart_gets_fresh_executor(sample_script):
+    with TestClient(app):
+        first_executor = app.state.executor
+
+    with TestClient(app) as restarted:
+        assert app.state.executor is not first_executor
+        with open(sample_script, "rb") as f:
+            response = restarted.post(
+                "/api/upload",
+                files={"file": ("test_script.txt", f, "text/plain")},
+                data={"wardrobe_inference": "false", "legal_alerts": "false"}
+            )
+        job_id = response.json()["job_id"]
+        for _ in range(10):
+            status_data = restarted.get(f"/api/status/{job_id}").json()
+            if status_data["status"] in ["completed", "failed"]:
+                break
+            time.sleep(1)
+
+    assert status_data["status"] == "completed", status_data["error"]
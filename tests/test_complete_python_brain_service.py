@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+from complete_python_brain_service import (
+    EnhancedSceneSalienceService as Service,
+    SCENE_RECOMMENDATIONS,
+    shutdown_analysis_executor,
+)
+
+SCRIPT = """INT. HOUSE - DAY
+AHMED
+SARA
+I love you, she cries by the window.
+EXT. STREET - NIGHT
+A car passes.
+"""
+
+@pytest.fixture
+def scenes():
+    return Service._extract_scenes(SCRIPT)
+
+@pytest.fixture(autouse=True)
+def analysis_pool():
+    yield
+    shutdown_analysis_executor()
+
+def test_single_scene_breakdown_and_weighted_score(scenes):
+    analysis = Service._analyze_single_scene(scenes[0], 0, 0, False, {})
+
+    breakdown = analysis["breakdown"]
+    assert breakdown["character_development"] == pytest.approx(2 / 5)
+    assert breakdown["emotional_impact"] == pytest.approx(2 / 5)
+    assert breakdown["visual_complexity"] == pytest.approx(1 / 5)
+    assert analysis["importance_score"] == pytest.approx(
+        0.25 * breakdown["character_development"]
+        + 0.35 * breakdown["plot_advancement"]
+        + 0.25 * breakdown["emotional_impact"]
+        + 0.15 * breakdown["visual_complexity"]
+    )
+    assert SCENE_RECOMMENDATIONS["plot_advancement"] in analysis["recommendations"]
+
+def test_complexity_factor_scales_score_up_to_one(scenes):
+    base = Service._analyze_single_scene(scenes[0], 0, 0, True, {})["importance_score"]
+    doubled = Service._analyze_single_scene(scenes[0], 0, 0, True, {"complexity_factor": 2.0})
+    ignored = Service._analyze_single_scene(scenes[0], 0, 0, False, {"complexity_factor": 2.0})
+    capped = Service._analyze_single_scene(scenes[0], 0, 0, True, {"complexity_factor": 100.0})
+
+    assert doubled["importance_score"] == pytest.approx(2 * base)
+    assert ignored["importance_score"] == pytest.approx(base)
+    assert capped["importance_score"] == 1.0
+
+def test_quantum_and_revolutionary_passes(scenes):
+    analysis = Service._analyze_single_scene(scenes[0], 0, 0, False, {})
+
+    quantum = Service._apply_quantum_analysis(analysis, scenes[0])
+    assert 0.0 <= quantum["quantum_uncertainty"] <= 1.0
+    assert quantum["quantum_coherence"] == pytest.approx(1.0 - quantum["quantum_uncertainty"])
+
+    revolutionary = Service._apply_revolutionary_enhancement(analysis, scenes[0], {})
+    assert revolutionary["dominant_dimension"] in ["character_development", "emotional_impact"]
+    assert revolutionary["revolutionary_score"] == pytest.approx(analysis["importance_score"])
+
+def test_analyze_scene_importance_keeps_iteration_then_scene_order():
+    result = asyncio.run(Service.analyze_scene_importance(
+        SCRIPT, iterations=2, quantum_analysis=True, revolutionary_mode=True
+    ))
+
+    order = [(a["iteration"], a["scene_id"]) for a in result["scene_analyses"]]
+    assert order == [(0, "scene_1"), (0, "scene_2"), (1, "scene_1"), (1, "scene_2")]
+    assert result["total_scenes"] == 2
+
+    summary = result["summary"]
+    assert summary["top_scenes"][0] == "scene_1"
+    assert set(summary["scene_scores"]) == {"scene_1", "scene_2"}
+    assert "average_quantum_coherence" in summary
+    assert len(summary["revolutionary_scores"]) == 4
+
+def test_metrics_read_the_background_snapshot_without_appending():
+    from complete_python_brain_service import AdvancedJobManager
+
+    async def run():
+        manager = AdvancedJobManager()
+        first = manager.get_performance_metrics()
+        history = len(manager.metrics_history)
+        again = manager.get_performance_metrics()
+        await manager.stop_system_sampler()
+        return first, again, history, len(manager.metrics_history)
+
+    first, again, history, history_after = asyncio.run(run())
+    # The first snapshot is built when the sampler starts; later reads reuse it
+    assert history == history_after == 1
+    assert again is first
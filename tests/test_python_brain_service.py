@@ -0,0 +1,108 @@
+import time
+import pytest
+from fastapi.testclient import TestClient
+import python_brain_service as service
+from python_brain_service import app, JobManager, split_script_scenes
+
+client = TestClient(app)
+
+@pytest.fixture(autouse=True)
+def running_app():
+    # Run the app lifespan so the process pool and job workers exist
+    with client:
+        yield
+
+def _regex_scenes(text, monkeypatch):
+    with monkeypatch.context() as patch:
+        patch.setattr(service, "NUMBA_AVAILABLE", False)
+        return split_script_scenes(text)
+
+@pytest.mark.parametrize("digit", ["7", "٣", "۵", "５", "१"])
+def test_scene_scanner_matches_regex_on_unicode_digits(digit, monkeypatch):
+    pytest.importorskip("numba")
+    text = (
+        f"مشهد {digit} داخلي نهار\nيدخل أحمد.\n\n"
+        "scene 2 exterior night\nSara leaves.\n\n"
+        "مشهد بدون رقم\nنص.\n\n"
+        f"  SCENE\n{digit}{digit}\nend."
+    )
+
+    scenes = split_script_scenes(text)
+
+    assert scenes == _regex_scenes(text, monkeypatch)
+    assert [number for number, _ in scenes] == [digit, "2", digit * 2]
+
+def test_scene_scanner_rejects_non_digit_after_header(monkeypatch):
+    pytest.importorskip("numba")
+    text = "مشهد أ داخلي\nنص\nscene é\nx\nscene ½\ny\nمشهد 4\nz"
+
+    scenes = split_script_scenes(text)
+
+    assert scenes == _regex_scenes(text, monkeypatch)
+    assert [number for number, _ in scenes] == ["4"]
+
+def test_status_filtered_jobs_listed_by_creation_time():
+    manager = JobManager()
+    job_ids = [manager.create_job() for _ in range(3)]
+    # Finish the jobs in reverse creation order
+    for job_id in reversed(job_ids):
+        manager.update_job(job_id, status="completed")
+
+    listed = [job.job_id for job in manager.get_all_jobs("completed")]
+    assert listed == job_ids[::-1]
+    assert [job.job_id for job in manager.get_all_jobs()] == job_ids[::-1]
+    assert [job.job_id for job in manager.get_all_jobs("completed", limit=2)] == job_ids[:0:-1]
+
+def test_purge_expired_removes_only_old_finished_jobs(monkeypatch):
+    manager = JobManager()
+    old_id, new_id, active_id = (manager.create_job() for _ in range(3))
+    manager.update_job(old_id, status="completed")
+    manager.update_job(new_id, status="failed")
+    manager.jobs[old_id].updated_at -= service.timedelta(seconds=service.JOB_TTL_SECONDS + 1)
+
+    assert manager.purge_expired() == 1
+    assert manager.get_job(old_id) is None
+    assert manager.get_job(new_id).status == "failed"
+    assert manager.get_job(active_id).status == "pending"
+
+def _analyze_async(test_client, text):
+    response = test_client.post(
+        "/analyze/async", json={"text": text, "component": "scene_salience"}
+    )
+    job_id = response.json()["job_id"]
+    for _ in range(50):
+        job = test_client.get(f"/jobs/{job_id}").json()
+        if job["status"] in ["completed", "failed"]:
+            break
+        time.sleep(0.1)
+    return job
+
+def test_lifespan_starts_and_stops_analysis_pool():
+    text = "مشهد 1\nأحمد: مرحبا\n\nمشهد 2\nسارة: وداعا"
+
+    with TestClient(app) as first:
+        executor = app.state.executor
+        assert _analyze_async(first, text + " 1")["status"] == "completed"
+
+    # Leaving the lifespan shuts its own pool down
+    with pytest.raises(RuntimeError):
+        executor.submit(time.time)
+
+    # A second startup in the same process gets a fresh pool and job queue
+    with TestClient(app) as restarted:
+        assert app.state.executor is not executor
+        sync = restarted.post(
+            "/analyze/sync", json={"text": text + " 2", "component": "scene_salience"}
+        )
+        assert sync.status_code == 200
+        assert _analyze_async(restarted, text + " 3")["status"] == "completed"
+
+@pytest.mark.parametrize("limit", [-1, 0, service.MAX_JOBS_IN_MEMORY + 1])
+def test_list_jobs_rejects_out_of_range_limit(limit):
+    response = client.get("/jobs", params={"limit": limit})
+    assert response.status_code == 422
+
+def test_list_jobs_filters_by_status_with_limit():
+    response = client.get("/jobs", params={"status": "completed", "limit": 1})
+    assert response.status_code == 200
+    assert len(response.json()["jobs"]) <= 1
@@ -146,8 +146,7 @@ async def analyze_text(request: AnalysisRequest):
     
     # معالجة بسيطة للطلب
     try:
-        # محاكاة معالجة
-        await asyncio.sleep(0.1)
+        start_time = time.perf_counter()
         
         result = {
             "text_length": len(request.text),
@@ -160,7 +159,7 @@ async def analyze_text(request: AnalysisRequest):
         if job:
             job.status = JobStatus.COMPLETED
             job.result = result
-            job.processing_time_ms = 100.0
+            job.processing_time_ms = (time.perf_counter() - start_time) * 1000
             
         return job
         
@@ -181,7 +180,6 @@ async def get_job_status(job_id: str):
 # وظائف مساعدة للاختبار
 async def process_single_text_async(text: str, component: ProcessingComponent, context: Dict[str, Any]) -> Dict[str, Any]:
     """معالجة نص واحد بشكل غير متزامن"""
-    await asyncio.sleep(0.1)  # محاكاة المعالجة
     return {
         "text_length": len(text),
         "component": component,
@@ -191,7 +189,6 @@ async def process_single_text_async(text: str, component: ProcessingComponent, c
 
 async def process_with_parallel_optimization(request) -> Dict[str, Any]:
     """معالجة محسنة متوازية"""
-    await asyncio.sleep(0.2)
     return {
         "optimization_type": "parallel",
         "text_length": len(request.text),
@@ -200,7 +197,6 @@ async def process_with_parallel_optimization(request) -> Dict[str, Any]:
 
 async def process_with_standard_optimization(request) -> Dict[str, Any]:
     """معالجة محسنة عادية"""
-    await asyncio.sleep(0.1)
     return {
         "optimization_type": "standard",
         "text_length": len(request.text),